@@ -0,0 +1,103 @@
+# --- Sound effect voices ---
+# Playing a Sound grabs any free mixer channel, so rapid fire and mass pops
+# could take every channel and pile dozens of plays into one frame. The
+# AudioManager gives each effect its own small pool of reserved channels
+# ("voices"):
+#
+#   * play() only counts requests; flush(), called once per frame, starts
+#     at most one voice per effect, so sound work per frame is bounded;
+#   * requests made during the same frame are merged into that one play,
+#     a little louder for each extra request (up to full volume);
+#   * when all of an effect's voices are busy, the one playing longest is
+#     cut off and reused.
+#
+# Needs an initialised mixer.
+
+import math
+
+import pygame
+
+
+class SoundEffect:
+    def __init__(self, sound, channels, volume):
+        self.sound = sound
+        self.channels = channels
+        self.volume = volume
+        self.started = [0] * len(channels)   # frame each voice last started
+        self.pending = 0                     # requests this frame
+
+
+class AudioManager:
+    def __init__(self, coalesce_gain=0.3):
+        # coalesce_gain: volume added per doubling of same-frame requests
+        self.coalesce_gain = coalesce_gain
+        self.effects = {}
+        self.frame = 0
+        # Stats
+        self.requests = 0
+        self.plays = 0
+        self.coalesced = 0    # requests merged into another play
+        self.stolen = 0       # voices cut off to make room
+        self.busy_high_water = 0
+
+    def add(self, name, sound, voices, volume=1.0):
+        # Reserves `voices` mixer channels for this effect
+        first = sum(len(effect.channels) for effect in self.effects.values())
+        total = first + voices
+        if pygame.mixer.get_num_channels() < total:
+            pygame.mixer.set_num_channels(total)
+        # Reserved channels are never picked by Sound.play() / find_channel()
+        pygame.mixer.set_reserved(total)
+        channels = [pygame.mixer.Channel(i) for i in range(first, total)]
+        self.effects[name] = SoundEffect(sound, channels, volume)
+
+    def play(self, name, count=1):
+        effect = self.effects.get(name)
+        if effect is None:
+            return
+        self.requests += count
+        effect.pending += count
+
+    def flush(self):
+        # Start this frame's sounds; call once per frame
+        self.frame += 1
+        busy = 0
+        for effect in self.effects.values():
+            count = effect.pending
+            if count:
+                effect.pending = 0
+                self.coalesced += count - 1
+                self._start(effect, count)
+            for channel in effect.channels:
+                busy += channel.get_busy()
+        if busy > self.busy_high_water:
+            self.busy_high_water = busy
+
+    def _start(self, effect, count):
+        channels = effect.channels
+        voice = None
+        for i, channel in enumerate(channels):
+            if not channel.get_busy():
+                voice = i
+                break
+        if voice is None:
+            # Steal the voice that has been playing longest
+            voice = min(range(len(channels)), key=effect.started.__getitem__)
+            self.stolen += 1
+        volume = min(1.0, effect.volume * (1 + self.coalesce_gain * math.log2(count)))
+        channel = channels[voice]
+        channel.set_volume(volume)
+        channel.play(effect.sound)
+        effect.started[voice] = self.frame
+        self.plays += 1
+
+    def stats(self):
+        return {
+            'voices': sum(len(effect.channels) for effect in self.effects.values()),
+            'busy': sum(channel.get_busy() for effect in self.effects.values() for channel in effect.channels),
+            'busy_high_water': self.busy_high_water,
+            'requests': self.requests,
+            'plays': self.plays,
+            'coalesced': self.coalesced,
+            'stolen': self.stolen,
+        }
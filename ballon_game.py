@@ -1,549 +1,883 @@
-import pygame
-import random
-import sys
-import os
-
-# Initialize Pygame & Mixer
-pygame.init()
-try:
-    pygame.mixer.init()
-    sound_enabled = True
-except pygame.error:
-    print("Warning: Pygame mixer could not be initialized. Running without sound.")
-    sound_enabled = False
-
-# Screen dimensions
-WIDTH, HEIGHT = 600, 800
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Balloon Shooter - Select Difficulty")
-
-# --- Colors ---
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-BLUE = (0, 0, 255)
-GRAY = (200, 200, 200)
-LIGHT_GRAY = (220, 220, 220)
-RED = (255, 0, 0)
-GREEN = (0, 150, 0)
-YELLOW = (255, 220, 0) # For Medium button maybe
-ORANGE = (255, 140, 0) # For Hard button maybe
-
-# Attractive colors for balloons
-attractive_colors = [
-    (255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 165, 0),
-    (128, 0, 128), (255, 255, 0), (0, 255, 255),
-]
-
-# --- Game Assets ---
-font_large = pygame.font.SysFont(None, 72)
-font_medium = pygame.font.SysFont(None, 48)
-font_small = pygame.font.SysFont(None, 36)
-font_tiny = pygame.font.SysFont(None, 24)
-
-# Sounds (Load with error handling - using your provided paths)
-shoot_sound = None
-pop_sound = None
-if sound_enabled:
-    try:
-        shoot_sound = pygame.mixer.Sound("shoot.wav")
-    except:
-        print("Warning: Could not load shoot.wav")
-    try:
-        pop_sound = pygame.mixer.Sound("pop.wav")
-    except:
-        print("Warning: Could not load pop.wav")
-
-# High score file
-HIGH_SCORE_FILE = "highscore.txt"
-
-# --- Game Settings ---
-FPS = 60
-INITIAL_SHOOTER_SPEED = 7 # Can still be adjusted by player
-BULLET_SPEED = 10
-INITIAL_LIVES = 5
-
-# --- NEW: Difficulty Levels ---
-DIFFICULTY_LEVELS = {
-    "Easy":   {'spawn_delay': 1800, 'min_speed': 1.5, 'max_speed': 3.0, 'score_multiplier': 1.0, 'color': GREEN},
-    "Medium": {'spawn_delay': 1300, 'min_speed': 2.0, 'max_speed': 4.5, 'score_multiplier': 1.5, 'color': YELLOW},
-    "Hard":   {'spawn_delay': 800,  'min_speed': 3.0, 'max_speed': 6.0, 'score_multiplier': 2.0, 'color': ORANGE}
-}
-
-# --- Balloon Properties ---
-BALLOON_TYPES = {
-    'small':  {'radius': 15, 'base_score': 3},
-    'medium': {'radius': 20, 'base_score': 2},
-    'large':  {'radius': 27, 'base_score': 1},
-}
-BALLOON_PROBABILITY = {'small': 0.3, 'medium': 0.5, 'large': 0.2}
-balloon_type_keys = list(BALLOON_TYPES.keys())
-balloon_probabilities = [BALLOON_PROBABILITY[key] for key in balloon_type_keys]
-
-# --- Shooter properties ---
-shooter_width = 50
-shooter_height = 20
-shooter_x = WIDTH // 2 - shooter_width // 2
-shooter_y = HEIGHT - shooter_height - 10
-
-# --- Bullet properties ---
-bullet_width = 5
-bullet_height = 10
-
-# --- Game State Variables ---
-game_state = "start" # "start", "playing", "paused", "game_over"
-score = 0
-high_score = 0
-lives = INITIAL_LIVES
-shooter_speed = INITIAL_SHOOTER_SPEED
-selected_difficulty = None # NEW: Store the chosen difficulty name
-# These will be set based on selected_difficulty
-balloon_spawn_delay = 0
-balloon_min_speed = 0
-balloon_max_speed = 0
-score_multiplier = 1.0
-
-# --- Lists for game objects ---
-bullets = []
-balloons = []
-
-# --- Clock ---
-clock = pygame.time.Clock()
-
-# --- Custom Events ---
-SPAWN_BALLOON = pygame.USEREVENT + 1
-
-# --- Button Class --- (Same as before)
-class Button:
-    def __init__(self, text, rect, base_color, hover_color, font, action=None):
-        self.text = text
-        self.rect = pygame.Rect(rect)
-        self.base_color = base_color
-        self.hover_color = hover_color
-        self.font = font
-        self.action = action
-        self.is_hovered = False
-
-    def draw(self, surface):
-        color = self.hover_color if self.is_hovered else self.base_color
-        pygame.draw.rect(surface, color, self.rect, border_radius=10)
-        pygame.draw.rect(surface, BLACK, self.rect, width=2, border_radius=10) # Outline
-        text_surf = self.font.render(self.text, True, BLACK)
-        text_rect = text_surf.get_rect(center=self.rect.center)
-        surface.blit(text_surf, text_rect)
-
-    def check_hover(self, mouse_pos):
-        self.is_hovered = self.rect.collidepoint(mouse_pos)
-
-    def handle_click(self, event):
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.is_hovered:
-            if self.action:
-                self.action()
-            return True
-        return False
-
-# --- Utility Functions --- (load/save high score, display_text, draw_multiline_text) ---
-def load_high_score():
-    global high_score
-    try:
-        if os.path.exists(HIGH_SCORE_FILE):
-            with open(HIGH_SCORE_FILE, 'r') as f:
-                high_score = int(f.read())
-        else:
-             high_score = 0
-    except (IOError, ValueError):
-        print(f"Warning: Could not read or parse {HIGH_SCORE_FILE}. Resetting high score.")
-        high_score = 0
-
-def save_high_score():
-    global high_score
-    try:
-        with open(HIGH_SCORE_FILE, 'w') as f:
-            f.write(str(high_score))
-    except IOError:
-        print(f"Warning: Could not save high score to {HIGH_SCORE_FILE}.")
-
-def display_text(text, font, color, center):
-    message = font.render(text, True, color)
-    rect = message.get_rect(center=center)
-    screen.blit(message, rect)
-
-def draw_multiline_text(surface, text, pos, font, color, line_spacing=1.2):
-    lines = text.split('\n')
-    x, y = pos
-    line_height = font.get_linesize() * line_spacing
-    for line in lines:
-        line_surface = font.render(line, True, color)
-        line_rect = line_surface.get_rect(topleft=(x, y))
-        surface.blit(line_surface, line_rect)
-        y += line_height
-
-def quit_game():
-    print("Quitting game...")
-    save_high_score()
-    pygame.quit()
-    sys.exit()
-
-def reset_game():
-    # ONLY resets score, lives, shooter position, and object lists
-    global score, lives, shooter_x, bullets, balloons, shooter_speed
-    print("Resetting game state (score, lives, position)...")
-    score = 0
-    lives = INITIAL_LIVES
-    shooter_x = WIDTH // 2 - shooter_width // 2
-    bullets = []
-    balloons = []
-    shooter_speed = INITIAL_SHOOTER_SPEED # Reset player-adjustable speed
-
-# --- NEW: Function to start the game with selected difficulty ---
-def start_game(difficulty_name):
-    global selected_difficulty
-    print(f"Starting game with difficulty: {difficulty_name}")
-    selected_difficulty = difficulty_name
-    change_state("playing")
-
-# --- Modified change_state function ---
-def change_state(new_state):
-    # --- Declare ALL globals modified in this function at the TOP ---
-    global game_state, balloon_spawn_delay, balloon_min_speed, balloon_max_speed
-    global score_multiplier, selected_difficulty # <--- ADD selected_difficulty HERE
-
-    print(f"Changing state from {game_state} to {new_state}")
-
-    # Stop timer regardless of new state, will be restarted if needed
-    pygame.time.set_timer(SPAWN_BALLOON, 0)
-
-    if new_state == "playing":
-        # If starting fresh (from start or game over)
-        if game_state == "start" or game_state == "game_over":
-            if selected_difficulty is None:
-                print("Error: No difficulty selected!")
-                return # Don't start playing
-
-            reset_game() # Reset score, lives, etc.
-
-            # Apply difficulty settings
-            params = DIFFICULTY_LEVELS[selected_difficulty]
-            balloon_spawn_delay = params['spawn_delay']
-            balloon_min_speed = params['min_speed']
-            balloon_max_speed = params['max_speed']
-            score_multiplier = params['score_multiplier']
-            print(f"Applied settings for {selected_difficulty}: delay={balloon_spawn_delay}, speed=({balloon_min_speed}-{balloon_max_speed}), score_mult={score_multiplier}")
-
-        # If resuming from pause, parameters are already set, just change state
-
-        game_state = "playing"
-        # Start/Resume the balloon spawn timer with the correct delay
-        pygame.time.set_timer(SPAWN_BALLOON, int(balloon_spawn_delay))
-
-    elif new_state == "paused":
-        if game_state == "playing":
-            game_state = "paused"
-            # Timer already stopped
-        else:
-             print(f"Cannot pause from state: {game_state}")
-             if game_state == "playing":
-                 pygame.time.set_timer(SPAWN_BALLOON, int(balloon_spawn_delay))
-             return # Don't change state
-
-    elif new_state == "game_over":
-        game_state = "game_over"
-        # Timer already stopped
-        global high_score # Need global here ONLY if assigning (we are, indirectly via save)
-        if score > high_score:
-            print(f"New high score: {score}")
-            high_score = score
-            save_high_score()
-
-    elif new_state == "start":
-        game_state = "start"
-        # Timer already stopped
-        # Reset selected difficulty for next choice
-        selected_difficulty = None # Now this assignment is valid because global was declared above
-        # --- REMOVE the redundant global declaration from here ---
-        # global selected_difficulty
-
-    else:
-         game_state = new_state
-
-# --- Button Instances ---
-button_width = 150 # Slightly smaller buttons for difficulty
-button_height = 50
-button_y = HEIGHT - 150
-spacing = 20
-
-# Difficulty Buttons
-easy_button = Button("Easy",
-                     (WIDTH // 2 - (button_width * 1.5 + spacing), button_y, button_width, button_height),
-                     DIFFICULTY_LEVELS["Easy"]["color"], LIGHT_GRAY, font_medium,
-                     action=lambda: start_game("Easy")) # Use start_game function
-
-medium_button = Button("Medium",
-                       (WIDTH // 2 - button_width // 2, button_y, button_width, button_height),
-                       DIFFICULTY_LEVELS["Medium"]["color"], LIGHT_GRAY, font_medium,
-                       action=lambda: start_game("Medium"))
-
-hard_button = Button("Hard",
-                     (WIDTH // 2 + button_width // 2 + spacing, button_y, button_width, button_height),
-                     DIFFICULTY_LEVELS["Hard"]["color"], LIGHT_GRAY, font_medium,
-                     action=lambda: start_game("Hard"))
-
-# Other Buttons
-font_small = pygame.font.Font(None, 36)  # Adjust the font size
-
-restart_button = Button("New Game",
-                        (WIDTH // 2 - button_width // 2, HEIGHT // 2 + (button_height // 2 - 20), button_width, button_height),
-                        GREEN, LIGHT_GRAY, font_small,  # Use smaller font
-                        action=lambda: change_state("start"))
-
-quit_button_game_over = Button("Quit",
-                        (WIDTH // 2 - button_width // 2, HEIGHT // 2 + (button_height // 2 + 60), button_width, button_height),
-                        RED, LIGHT_GRAY, font_small, action=quit_game)
-
-
-resume_button = Button("Resume (P)",
-                       (WIDTH // 2 - (button_width + 40) // 2, HEIGHT // 2 - (button_height + 10), button_width + 40, button_height),
-                       GREEN, LIGHT_GRAY, font_medium, action=lambda: change_state("playing"))
-
-quit_button_pause = Button("Quit (ESC)",
-                           (WIDTH // 2 - (button_width + 40) // 2, HEIGHT // 2 + (button_height - 25), button_width + 40, button_height),
-                           RED, LIGHT_GRAY, font_medium, action=quit_game)
-
-
-difficulty_buttons = [easy_button, medium_button, hard_button] # Group for easier handling
-
-# --- Drawing Functions --- (draw_shooter, draw_bullet, draw_balloon are the same)
-def draw_shooter(x, y):
-    pygame.draw.rect(screen, BLUE, (x, y, shooter_width, shooter_height), border_radius=5)
-    cannon_rect = pygame.Rect(x + shooter_width // 2 - 3, y - 5, 6, 5)
-    pygame.draw.rect(screen, BLUE, cannon_rect)
-
-def draw_bullet(bullet_rect):
-    pygame.draw.rect(screen, BLACK, bullet_rect)
-
-def draw_balloon(balloon):
-    radius = balloon['radius']
-    pygame.draw.circle(screen, balloon['color'], (balloon['x'], balloon['y']), radius)
-    knot_offset = radius * 0.25
-    knot_height = radius * 0.4
-    points = [
-        (balloon['x'] - knot_offset, balloon['y'] + radius),
-        (balloon['x'] + knot_offset, balloon['y'] + radius),
-        (balloon['x'], balloon['y'] + radius + knot_height)
-    ]
-    pygame.draw.polygon(screen, balloon['color'], points)
-    shine_radius = int(radius * 0.2)
-    shine_offset = int(radius * 0.4)
-    shine_center = (balloon['x'] + shine_offset, balloon['y'] - shine_offset)
-    pygame.draw.circle(screen, WHITE, shine_center, shine_radius)
-
-
-# --- Screen Drawing Functions ---
-def draw_start_screen():
-    screen.fill(WHITE)
-    display_text("Balloon Shooter", font_large, BLACK, (WIDTH // 2, 100)) # Simpler title
-    display_text(f"High Score: {high_score}", font_medium, BLUE, (WIDTH // 2, 180))
-
-    instructions = (
-        "How to Play:\n\n"
-        "- Use LEFT/RIGHT arrows to move.\n"
-        "- Press SPACE to shoot.\n"
-        "- Pop balloons before they fall.\n"
-        "- UP/DOWN arrows change shooter speed.\n"
-        "- Different sizes = different points!\n"
-        "- Higher difficulty = more points!\n\n"
-        "Shortcuts: P = Pause | ESC = Quit"
-    )
-    draw_multiline_text(screen, instructions, (50, 250), font_small, BLACK)
-
-    display_text("Select Difficulty:", font_medium, BLACK, (WIDTH // 2, HEIGHT - 180))
-    # Draw difficulty buttons
-    for button in difficulty_buttons:
-        button.draw(screen)
-
-    pygame.display.flip()
-
-def draw_game_screen():
-    screen.fill(WHITE)
-    draw_shooter(shooter_x, shooter_y)
-    for bullet in bullets:
-        draw_bullet(bullet)
-    for balloon in balloons:
-        draw_balloon(balloon)
-
-    # Draw HUD
-    display_text(f"Score: {score}", font_small, BLACK, (80, 30))
-    lives_text = font_small.render("Lives:", True, BLACK)
-    lives_rect = lives_text.get_rect(topright=(WIDTH - 130, 15))
-    screen.blit(lives_text, lives_rect)
-    for i in range(lives):
-         heart_x = WIDTH - 110 + (i * 25)
-         pygame.draw.circle(screen, RED, (heart_x, 30), 10)
-
-    display_text(f"Speed: {shooter_speed}", font_small, BLACK, (WIDTH // 2, 30))
-    # Display selected difficulty instead of level
-    if selected_difficulty:
-        display_text(f"Difficulty: {selected_difficulty}", font_small, BLACK, (WIDTH // 2, 60))
-
-    pygame.display.flip()
-
-def draw_pause_screen():
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((128, 128, 128, 180))
-    screen.blit(overlay, (0, 0))
-    display_text("Paused", font_large, BLACK, (WIDTH // 2, HEIGHT // 2 - 100))
-    resume_button.draw(screen)
-    quit_button_pause.draw(screen)
-    display_text("Press P to Resume or ESC to Quit", font_tiny, BLACK, (WIDTH // 2, HEIGHT // 2 + 100))
-    pygame.display.flip()
-
-def draw_game_over_screen():
-    screen.fill(GRAY)
-    display_text("Game Over!", font_large, RED, (WIDTH // 2, HEIGHT // 2 - 200))
-    display_text(f"Final Score: {score}", font_medium, BLACK, (WIDTH // 2, HEIGHT // 2 - 130))
-    if selected_difficulty:
-         display_text(f"(Difficulty: {selected_difficulty})", font_small, BLACK, (WIDTH // 2, HEIGHT // 2 - 50))
-
-    is_new_high = score > high_score and score > 0
-    final_high_score = max(score, high_score) if is_new_high else high_score
-
-    if is_new_high:
-         display_text(f"New High Score!", font_medium, BLUE, (WIDTH // 2, HEIGHT // 2 + 210))
-         display_text(f"High Score: {final_high_score}", font_small, BLACK, (WIDTH // 2, HEIGHT // 2 + 250))
-    else:
-         display_text(f"High Score: {final_high_score}", font_small, BLACK, (WIDTH // 2, HEIGHT // 2 + 250))
-
-    restart_button.draw(screen) # Button now says "New Game" and goes to start screen
-    quit_button_game_over.draw(screen)
-    pygame.display.flip()
-
-# --- Game Logic Update Function --- (Removed update_difficulty call)
-def run_game_logic():
-    global shooter_x, score, lives, game_state
-
-    keys = pygame.key.get_pressed()
-    if keys[pygame.K_LEFT] and shooter_x > 0:
-        shooter_x -= shooter_speed
-    if keys[pygame.K_RIGHT] and shooter_x < WIDTH - shooter_width:
-        shooter_x += shooter_speed
-
-    for bullet in bullets[:]:
-        bullet.y -= BULLET_SPEED
-        if bullet.y < 0:
-            bullets.remove(bullet)
-
-    for balloon in balloons[:]:
-        balloon['y'] += balloon['speed']
-        radius = balloon['radius']
-
-        if balloon['y'] > HEIGHT + radius:
-            lives -= 1
-            balloons.remove(balloon)
-            print(f"Balloon missed! Lives left: {lives}")
-            if lives < 0:
-                change_state("game_over")
-            continue
-
-        balloon_center_x, balloon_center_y = balloon['x'], balloon['y']
-        balloon_rect = pygame.Rect(balloon_center_x - radius, balloon_center_y - radius, radius * 2, radius * 2)
-
-        for bullet in bullets[:]:
-            if balloon_rect.colliderect(bullet):
-                dx = balloon_center_x - bullet.centerx
-                dy = balloon_center_y - bullet.centery
-                distance_sq = dx*dx + dy*dy
-                if distance_sq < (radius + bullet.width)**2:
-                    # Calculate score based on balloon type and difficulty multiplier
-                    score_to_add = int(balloon['base_score'] * score_multiplier) # Apply multiplier
-                    score += score_to_add
-
-                    bullets.remove(bullet)
-                    balloons.remove(balloon)
-                    if sound_enabled and pop_sound:
-                        pop_sound.play()
-                    # REMOVED call to update_difficulty() here
-                    break
-
-# --- Main Game Loop ---
-load_high_score()
-running = True
-while running:
-    mouse_pos = pygame.mouse.get_pos()
-
-    # --- Event Handling ---
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                running = False
-
-        # --- State-DEPENDENT Event Handling ---
-        if game_state == "start":
-            # Handle difficulty button clicks
-            for button in difficulty_buttons:
-                button.check_hover(mouse_pos)
-                button.handle_click(event) # Action (start_game) handled by button
-
-        elif game_state == "playing":
-            if event.type == SPAWN_BALLOON:
-                chosen_type_key = random.choices(balloon_type_keys, weights=balloon_probabilities, k=1)[0]
-                balloon_info = BALLOON_TYPES[chosen_type_key]
-                radius = balloon_info['radius']
-                base_score = balloon_info['base_score']
-
-                balloon = {
-                    'x': random.randint(radius, WIDTH - radius),
-                    'y': -radius,
-                    # Use speeds set by difficulty
-                    'speed': random.uniform(balloon_min_speed, balloon_max_speed),
-                    'color': random.choice(attractive_colors),
-                    'radius': radius,
-                    'base_score': base_score
-                }
-                balloons.append(balloon)
-
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    bullet_rect = pygame.Rect(shooter_x + shooter_width // 2 - bullet_width // 2,
-                                                shooter_y - bullet_height, bullet_width, bullet_height)
-                    bullets.append(bullet_rect)
-                    if sound_enabled and shoot_sound:
-                        shoot_sound.play()
-                elif event.key == pygame.K_UP:
-                    shooter_speed += 1
-                elif event.key == pygame.K_DOWN:
-                    shooter_speed = max(1, shooter_speed - 1)
-                elif event.key == pygame.K_p:
-                    change_state("paused")
-
-        elif game_state == "paused":
-            resume_button.check_hover(mouse_pos)
-            quit_button_pause.check_hover(mouse_pos)
-            resume_button.handle_click(event)
-            quit_button_pause.handle_click(event)
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_p:
-                 change_state("playing")
-
-        elif game_state == "game_over":
-            restart_button.check_hover(mouse_pos) # Button now says "New Game"
-            quit_button_game_over.check_hover(mouse_pos)
-            restart_button.handle_click(event) # Action now goes to "start" state
-            quit_button_game_over.handle_click(event)
-
-    # --- Game Logic & Drawing based on State ---
-    if game_state == "start":
-        draw_start_screen()
-    elif game_state == "playing":
-        run_game_logic()
-        draw_game_screen()
-    elif game_state == "paused":
-        draw_pause_screen()
-    elif game_state == "game_over":
-        draw_game_over_screen()
-
-    # --- Frame Rate Control ---
-    clock.tick(FPS)
-
-# --- Cleanup ---
-quit_game()
\ No newline at end of file
+# Taken before the heavier imports, for the startup report
+import time
+STARTUP_NS = time.perf_counter_ns()
+
+import argparse
+import os
+import pygame
+import random
+import sys
+import threading
+
+from settings import (
+    WIDTH, HEIGHT, FPS, WHITE, BLACK, BLUE, GRAY, LIGHT_GRAY, RED, GREEN,
+    BULLET_SPEED, MAX_CATCH_UP_TICKS, FONT_NAME, SOUND_VOICES, SOUND_VOLUME,
+    DIFFICULTY_LEVELS, shooter_width, shooter_height, shooter_y,
+)
+from simulation import Simulation, FrameInput, FRAME_MS
+from sprites import BalloonAtlas, render_balloon
+from dirty_rects import DirtyRectRenderer
+from texture_renderer import TextureRenderer
+from text_cache import TextCache
+from replay import ReplayRecorder, MAX_SEED
+from profiler import FrameProfiler, StartupTimer
+from font_cache import FontCache
+from leaderboard import Leaderboard, LEADERBOARD_FILE
+from audio import AudioManager
+from event_dispatch import EventDispatcher
+from telemetry import Telemetry, FrameStats, TELEMETRY_DIR
+from snapshot import SnapshotRing, SnapshotError, capture, restore, save_snapshot, load_snapshot, SAVE_FILE
+
+# Longest the static screens sleep waiting for input before looping again
+IDLE_WAIT_MS = 500
+
+# Grey blended over the game while paused
+PAUSE_OVERLAY = (128, 128, 128, 180)
+
+# Profiler overlay: frames the percentiles cover, and how often they refresh
+PROFILER_WINDOW = 300
+PROFILER_REFRESH_FRAMES = 30
+
+# --- Display, fonts and sounds ---
+# Nothing is initialised at import time; init_game() fills these in so the
+# module (and the simulation behind it) can be imported without a window.
+screen = None
+clock = None
+font_large = font_medium = font_small = font_tiny = None
+balloon_atlas = None
+dirty_renderer = None # Set by --dirty-rects; None means full flips
+gpu = None # TextureRenderer with --renderer texture; None draws on the display surface
+shooter_sprite = None # The shooter, pre-drawn for the texture renderer
+text_cache = TextCache()
+recorder = None # ReplayRecorder when started with --record
+profiler = None # FrameProfiler when started with --profile
+profiler_out = None # File the profile is dumped to on exit
+profiler_lines = [] # Overlay text, refreshed every PROFILER_REFRESH_FRAMES
+static_screen_dirty = True
+pause_overlay = None  # Full-screen translucent grey, made once
+pause_backdrop = None # Last gameplay frame with the overlay applied
+audio = None # AudioManager, set once the mixer is up and the sounds are loaded
+startup_report = False # --startup-report
+leaderboard = None # Top scores per difficulty (leaderboard.py)
+game_started_at = 0.0 # time.monotonic() when the current game began
+telemetry = None # Gameplay and frame-time event stream (telemetry.py); None with --no-telemetry
+frame_stats = None # Emits the per-second "frames" telemetry events
+snapshots = None # SnapshotRing for rewinding and saving; None while recording a replay
+
+# --- Game state ---
+# All gameplay state lives in the simulation; this module only draws it
+# and feeds it keyboard input.
+sim = None
+prev_shooter_x = None # Shooter position before the last tick, for interpolation
+accumulator_ms = 0 # Elapsed time not yet simulated (fixed timestep, see main)
+
+# --- Input ---
+# Events are routed through a table keyed by (state, event type, key), see
+# register_handlers(); presses wait in `pressed` (FrameInput field names)
+# until the next tick uses them.
+dispatcher = None
+running = True
+pressed = set()
+
+# --- Button Class --- (Same as before)
+class Button:
+    def __init__(self, text, rect, base_color, hover_color, font, action=None):
+        self.text = text
+        self.rect = pygame.Rect(rect)
+        self.base_color = base_color
+        self.hover_color = hover_color
+        self.font = font
+        self.action = action
+        self.is_hovered = False
+
+    def draw(self, surface):
+        color = self.hover_color if self.is_hovered else self.base_color
+        pygame.draw.rect(surface, color, self.rect, border_radius=10)
+        pygame.draw.rect(surface, BLACK, self.rect, width=2, border_radius=10) # Outline
+        text_surf = render_text(self.font, self.text, BLACK)
+        text_rect = text_surf.get_rect(center=self.rect.center)
+        surface.blit(text_surf, text_rect)
+
+    def check_hover(self, mouse_pos):
+        # Returns True when the hover state changed (the button needs redrawing)
+        was_hovered = self.is_hovered
+        self.is_hovered = self.rect.collidepoint(mouse_pos)
+        return self.is_hovered != was_hovered
+
+    def handle_click(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.is_hovered:
+            if self.action:
+                self.action()
+            return True
+        return False
+
+# --- Utility Functions --- (display_text, draw_multiline_text) ---
+def render_text(font, text, color):
+    # All text goes through the cache, so unchanged strings aren't re-rasterised
+    return text_cache.render(font, text, color)
+
+def display_text(text, font, color, center, surface=None):
+    if surface is None:
+        surface = screen
+    message = render_text(font, text, color)
+    rect = message.get_rect(center=center)
+    surface.blit(message, rect)
+    return rect
+
+def draw_multiline_text(surface, text, pos, font, color, line_spacing=1.2):
+    lines = text.split('\n')
+    x, y = pos
+    line_height = font.get_linesize() * line_spacing
+    for line in lines:
+        line_surface = render_text(font, line, color)
+        line_rect = line_surface.get_rect(topleft=(x, y))
+        surface.blit(line_surface, line_rect)
+        y += line_height
+
+def quit_game():
+    print("Quitting game...")
+    if snapshots is not None and sim.game_state in ("playing", "paused"):
+        # Continued from the start screen next time (C)
+        try:
+            save_snapshot(SAVE_FILE, capture(sim))
+            print(f"Game saved to {SAVE_FILE}")
+        except IOError as e:
+            print(f"Warning: Could not save game to {SAVE_FILE} ({e}).")
+    # Scores are recorded when a game ends; this only waits for the writes
+    leaderboard.close()
+    if telemetry:
+        telemetry.close()
+        stats = telemetry.stats()
+        print(f"Telemetry: {stats['written']} events written to {telemetry.directory}, {stats['dropped']} dropped")
+    if recorder:
+        recorder.close()
+        print(f"Replay saved to {recorder.path} ({recorder.frames} frames)")
+    if profiler and profiler_out:
+        profiler.dump(profiler_out)
+        print(f"Profile saved to {profiler_out} ({min(profiler.frames, profiler.capacity)} frames)")
+    pygame.quit()
+    sys.exit()
+
+# Menu actions go through these so a replay recorder sees them too
+def start_game(difficulty_name):
+    if recorder:
+        recorder.record_start_game(difficulty_name)
+    sim.start_game(difficulty_name)
+
+def set_state(new_state):
+    if recorder:
+        recorder.record_change_state(new_state)
+    sim.change_state(new_state)
+
+def on_state_change(old_state, new_state):
+    global game_started_at
+    # sim.high_score is the best of the difficulty being played, or the
+    # best overall on the start screen
+    if new_state == "playing" and old_state != "paused":
+        game_started_at = time.monotonic()
+        sim.high_score = leaderboard.best(sim.selected_difficulty)
+        if snapshots:
+            snapshots.clear()
+    elif new_state == "game_over":
+        # Queued for the leaderboard's writer thread, so this doesn't block
+        leaderboard.record(sim.selected_difficulty, sim.score, round(time.monotonic() - game_started_at, 1))
+    elif new_state == "start":
+        sim.high_score = leaderboard.best()
+    # Other screens draw over the whole window
+    if dirty_renderer:
+        dirty_renderer.invalidate()
+    if new_state == "paused":
+        capture_pause_backdrop()
+    # A new game shouldn't slide the shooter over from where the last one ended
+    if new_state == "playing" and old_state != "paused":
+        global prev_shooter_x
+        prev_shooter_x = None
+    if new_state == "playing":
+        reset_frame_clock()
+    # Only the new screen's events get into the queue
+    if dispatcher:
+        dispatcher.filter_events(new_state)
+    request_redraw()
+
+# --- Rewind and saved games (snapshot.py) ---
+def redraw_pause_backdrop():
+    # The game under the pause screen changed: draw it and grey it again
+    global prev_shooter_x
+    prev_shooter_x = None
+    if dirty_renderer:
+        dirty_renderer.invalidate()
+    draw_game_screen()
+    capture_pause_backdrop()
+    request_redraw()
+
+def rewind_game(event):
+    # Back to the last ring snapshot (further back on every press)
+    if snapshots is None or not snapshots.rewind(sim):
+        return
+    # Snapshots are taken while playing; stay on the pause screen
+    sim.game_state = "paused"
+    if telemetry:
+        telemetry.emit("rewind", frame=sim.frame, score=sim.score, lives=sim.lives)
+    redraw_pause_backdrop()
+
+def continue_saved_game(event):
+    global game_started_at
+    if snapshots is None or not os.path.exists(SAVE_FILE):
+        return
+    try:
+        data = load_snapshot(SAVE_FILE)
+        restore(sim, data)
+    except (IOError, SnapshotError) as e:
+        print(f"Warning: Could not load saved game from {SAVE_FILE} ({e}).")
+        return
+    finally:
+        # A saved game is continued once (it is saved again on quitting)
+        try:
+            os.remove(SAVE_FILE)
+        except OSError:
+            pass
+    print(f"Continuing saved game: {sim.selected_difficulty}, score {sim.score}")
+    sim.game_state = "paused"
+    game_started_at = time.monotonic()
+    sim.high_score = leaderboard.best(sim.selected_difficulty)
+    snapshots.clear()
+    if telemetry:
+        telemetry.emit("continue", frame=sim.frame, difficulty=sim.selected_difficulty, score=sim.score)
+    draw_game_screen()
+    on_state_change("start", "paused")
+
+def reset_frame_clock():
+    # Time spent on the start or pause screen isn't game time. Without this
+    # the first playing frame would count it and run MAX_CATCH_UP_TICKS
+    global accumulator_ms
+    if clock:
+        clock.tick()
+    accumulator_ms = 0
+
+def request_redraw():
+    # The static screens (start, paused, game over) are only redrawn when
+    # something on them changed
+    global static_screen_dirty
+    static_screen_dirty = True
+
+def wait_for_events(timeout_ms):
+    # Sleep until something happens instead of spinning at FPS
+    event = pygame.event.wait(timeout_ms)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+# --- Initialisation ---
+def init_game(seed=None, startup=None, leaderboard_path=LEADERBOARD_FILE, telemetry=None,
+              renderer="surface", render_driver=None):
+    # Gets the start screen up as early as possible: only the display and
+    # font modules are started, fonts come from the font cache, and the
+    # mixer and sounds are loaded on a background thread afterwards.
+    # startup: StartupTimer recording each step (for --startup-report)
+    # leaderboard_path: None keeps scores in memory only
+    # telemetry: passed to the Simulation, which then records its events
+    # there instead of printing them
+    # renderer: "surface" (the display surface) or "texture"
+    # (texture_renderer.py, on render_driver or the best one available)
+    global screen, clock, sim, balloon_atlas, static_screen_dirty, leaderboard, gpu, shooter_sprite
+    global font_large, font_medium, font_small, font_tiny
+    if startup is None:
+        startup = StartupTimer()
+    startup.mark("imports")
+
+    # pygame.init() would also start the joystick, camera and mixer modules
+    pygame.display.init()
+    pygame.font.init()
+    startup.mark("pygame init")
+
+    if renderer == "texture":
+        gpu = TextureRenderer("Balloon Shooter - Select Difficulty", (WIDTH, HEIGHT), render_driver)
+        # The menus are still drawn in software, on this, and uploaded
+        screen = pygame.Surface((WIDTH, HEIGHT))
+        shooter_sprite = pygame.Surface((shooter_width, shooter_height + 5), pygame.SRCALPHA)
+        draw_shooter(0, 5, shooter_sprite)
+    else:
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Balloon Shooter - Select Difficulty")
+    clock = pygame.time.Clock()
+    startup.mark("window")
+
+    fonts = FontCache()
+    font_large = fonts.font(FONT_NAME, 72)
+    font_medium = fonts.font(FONT_NAME, 48)
+    font_small = fonts.font(FONT_NAME, 36)
+    font_tiny = fonts.font(FONT_NAME, 24)
+    fonts.save()
+    startup.mark("fonts")
+
+    sim = Simulation(verbose=telemetry is None, on_state_change=on_state_change, seed=seed, telemetry=telemetry)
+    create_buttons()
+    register_handlers()
+    dispatcher.filter_events(sim.game_state)
+    startup.mark("game state")
+    leaderboard = Leaderboard(leaderboard_path)
+    sim.high_score = leaderboard.best()
+    startup.mark("leaderboard")
+
+    draw_start_screen()
+    static_screen_dirty = False
+    startup.mark("first frame")
+
+    # --- Game Assets ---
+    balloon_atlas = BalloonAtlas() # Every balloon look, pre-rendered once
+    startup.mark("balloon atlas")
+
+    threading.Thread(target=load_sounds, args=(startup,), daemon=True).start()
+    return startup
+
+def load_sound(filename):
+    try:
+        return pygame.mixer.Sound(filename)
+    except (pygame.error, FileNotFoundError):
+        print(f"Warning: Could not load {filename}")
+        return None
+
+def load_sounds(startup):
+    # Runs on a background thread; the game is silent until it's done
+    global audio
+    start = time.perf_counter_ns()
+    try:
+        pygame.mixer.init()
+    except pygame.error:
+        print("Warning: Pygame mixer could not be initialized. Running without sound.")
+        return
+    manager = AudioManager()
+    for name, filename in (("shoot", "shoot.wav"), ("pop", "pop.wav")):
+        sound = load_sound(filename)
+        if sound:
+            manager.add(name, sound, SOUND_VOICES[name], SOUND_VOLUME)
+    audio = manager
+    startup.mark_since("sounds (background)", start)
+    if startup_report:
+        print(startup.format_step(startup.steps[-1]))
+
+# --- Button Instances ---
+button_width = 150 # Slightly smaller buttons for difficulty
+button_height = 50
+button_y = HEIGHT - 150
+spacing = 20
+
+easy_button = medium_button = hard_button = None
+restart_button = quit_button_game_over = None
+resume_button = quit_button_pause = None
+difficulty_buttons = []
+
+def create_buttons():
+    # Buttons need fonts, so they are built once pygame is initialised
+    global easy_button, medium_button, hard_button, difficulty_buttons
+    global restart_button, quit_button_game_over, resume_button, quit_button_pause
+
+    # Difficulty Buttons
+    easy_button = Button("Easy",
+                         (WIDTH // 2 - (button_width * 1.5 + spacing), button_y, button_width, button_height),
+                         DIFFICULTY_LEVELS["Easy"]["color"], LIGHT_GRAY, font_medium,
+                         action=lambda: start_game("Easy")) # Use start_game function
+
+    medium_button = Button("Medium",
+                           (WIDTH // 2 - button_width // 2, button_y, button_width, button_height),
+                           DIFFICULTY_LEVELS["Medium"]["color"], LIGHT_GRAY, font_medium,
+                           action=lambda: start_game("Medium"))
+
+    hard_button = Button("Hard",
+                         (WIDTH // 2 + button_width // 2 + spacing, button_y, button_width, button_height),
+                         DIFFICULTY_LEVELS["Hard"]["color"], LIGHT_GRAY, font_medium,
+                         action=lambda: start_game("Hard"))
+
+    # Other Buttons
+    restart_button = Button("New Game",
+                            (WIDTH // 2 - button_width // 2, HEIGHT // 2 + (button_height // 2 - 20), button_width, button_height),
+                            GREEN, LIGHT_GRAY, font_small,  # Use smaller font
+                            action=lambda: set_state("start"))
+
+    quit_button_game_over = Button("Quit",
+                            (WIDTH // 2 - button_width // 2, HEIGHT // 2 + (button_height // 2 + 60), button_width, button_height),
+                            RED, LIGHT_GRAY, font_small, action=quit_game)
+
+
+    resume_button = Button("Resume (P)",
+                           (WIDTH // 2 - (button_width + 40) // 2, HEIGHT // 2 - (button_height + 10), button_width + 40, button_height),
+                           GREEN, LIGHT_GRAY, font_medium, action=lambda: set_state("playing"))
+
+    quit_button_pause = Button("Quit (ESC)",
+                               (WIDTH // 2 - (button_width + 40) // 2, HEIGHT // 2 + (button_height - 25), button_width + 40, button_height),
+                               RED, LIGHT_GRAY, font_medium, action=quit_game)
+
+
+    difficulty_buttons = [easy_button, medium_button, hard_button] # Group for easier handling
+    state_buttons.update({
+        "start": difficulty_buttons,
+        "paused": [resume_button, quit_button_pause],
+        "game_over": [restart_button, quit_button_game_over],
+    })
+
+# Buttons shown on each screen
+state_buttons = {}
+
+def update_hover(mouse_pos):
+    # Once per frame (and before a click), however many mouse events came in
+    for button in state_buttons.get(sim.game_state, ()):
+        if button.check_hover(mouse_pos):
+            request_redraw()
+
+# --- Event Handlers ---
+def stop_running(event):
+    global running
+    running = False
+
+def toggle_profiler_overlay(event):
+    if profiler:
+        profiler.overlay = not profiler.overlay
+
+def click_button(event):
+    # Hover may be a frame old, so check against where the click happened
+    update_hover(event.pos)
+    for button in state_buttons.get(sim.game_state, ()):
+        if button.handle_click(event):
+            break
+
+def wake(event):
+    # Mouse motion only needs to wake wait_for_events(); hover is updated
+    # once per frame from pygame.mouse.get_pos()
+    pass
+
+def press(name):
+    # Handler that queues a FrameInput flag for the next tick
+    def handler(event):
+        pressed.add(name)
+    return handler
+
+def register_handlers():
+    global dispatcher
+    dispatcher = EventDispatcher(always_allowed=(pygame.QUIT, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED))
+    on = dispatcher.on
+    # Every state
+    on(None, pygame.QUIT, stop_running)
+    on(None, pygame.VIDEOEXPOSE, lambda event: request_redraw())
+    on(None, pygame.WINDOWEXPOSED, lambda event: request_redraw())
+    on(None, pygame.KEYDOWN, stop_running, key=pygame.K_ESCAPE)
+    on(None, pygame.KEYDOWN, toggle_profiler_overlay, key=pygame.K_F3)
+    # Menus: buttons (mouse motion and key releases aren't let in while
+    # playing, where held keys are read with pygame.key.get_pressed())
+    for state in state_buttons:
+        on(state, pygame.MOUSEBUTTONDOWN, click_button, key=1)
+        on(state, pygame.MOUSEMOTION, wake)
+    on("playing", pygame.KEYDOWN, press("fire"), key=pygame.K_SPACE)
+    on("playing", pygame.KEYDOWN, press("speed_up"), key=pygame.K_UP)
+    on("playing", pygame.KEYDOWN, press("speed_down"), key=pygame.K_DOWN)
+    on("playing", pygame.KEYDOWN, press("pause"), key=pygame.K_p)
+    on("paused", pygame.KEYDOWN, press("pause"), key=pygame.K_p)
+    on("paused", pygame.KEYDOWN, rewind_game, key=pygame.K_r)
+    on("start", pygame.KEYDOWN, continue_saved_game, key=pygame.K_c)
+
+# Area the life hearts are drawn in (room for INITIAL_LIVES hearts)
+HEARTS_RECT = pygame.Rect(WIDTH - 120, 20, 120, 21)
+
+# --- Drawing Functions --- (draw_shooter, draw_bullet, draw_balloon are the same)
+def draw_shooter(x, y, surface=None):
+    if surface is None:
+        surface = screen
+    body_rect = pygame.draw.rect(surface, BLUE, (x, y, shooter_width, shooter_height), border_radius=5)
+    cannon_rect = pygame.Rect(x + shooter_width // 2 - 3, y - 5, 6, 5)
+    pygame.draw.rect(surface, BLUE, cannon_rect)
+    return body_rect.union(cannon_rect)
+
+def draw_bullet(bullet_rect):
+    return pygame.draw.rect(screen, BLACK, bullet_rect)
+
+def draw_balloon(balloon):
+    # Primitive drawing of a single balloon; the game screen blits them from
+    # balloon_atlas instead. Drawn on the row the atlas puts it on: the knot
+    # polygon would round a fractional y its own way
+    render_balloon(screen, balloon.color, balloon.x, int(balloon.y), balloon.radius)
+
+
+# --- Screen Drawing Functions ---
+def flip_screen():
+    # Shows a static screen drawn on `screen`
+    if gpu:
+        gpu.present_surface(screen)
+    else:
+        pygame.display.flip()
+
+def interpolated_shooter_x(alpha):
+    # Where the shooter is drawn, alpha of the way through the last tick
+    shooter_x = sim.shooter_x
+    if prev_shooter_x is not None and alpha != 1.0:
+        shooter_x = round(prev_shooter_x + (shooter_x - prev_shooter_x) * alpha)
+    return shooter_x
+
+def draw_start_screen():
+    screen.fill(WHITE)
+    display_text("Balloon Shooter", font_large, BLACK, (WIDTH // 2, 100)) # Simpler title
+    display_text(f"High Score: {sim.high_score}", font_medium, BLUE, (WIDTH // 2, 180))
+    bests = "   ".join(f"{name}: {leaderboard.best(name)}" for name in DIFFICULTY_LEVELS)
+    display_text(bests, font_tiny, BLACK, (WIDTH // 2, 215))
+
+    instructions = (
+        "How to Play:\n\n"
+        "- Use LEFT/RIGHT arrows to move.\n"
+        "- Press SPACE to shoot.\n"
+        "- Pop balloons before they fall.\n"
+        "- UP/DOWN arrows change shooter speed.\n"
+        "- Different sizes = different points!\n"
+        "- Higher difficulty = more points!\n\n"
+        "Shortcuts: P = Pause | ESC = Quit"
+    )
+    draw_multiline_text(screen, instructions, (50, 250), font_small, BLACK)
+
+    display_text("Select Difficulty:", font_medium, BLACK, (WIDTH // 2, HEIGHT - 180))
+    if snapshots is not None and os.path.exists(SAVE_FILE):
+        display_text("Press C to continue your saved game", font_tiny, BLUE, (WIDTH // 2, HEIGHT - 40))
+    # Draw difficulty buttons
+    for button in difficulty_buttons:
+        button.draw(screen)
+
+    flip_screen()
+
+def draw_game_screen(alpha=1.0):
+    # alpha: how far (0..1) the time being drawn is from the previous tick
+    # to the latest one. Moving objects are drawn 1 - alpha ticks behind
+    # where the simulation has them; every tick moves them by a fixed amount
+    # (speed), so their previous positions don't need to be stored.
+    if gpu:
+        gpu.clear(WHITE)
+        draw_game_textures(alpha)
+        if profiler:
+            profiler.mark("draw")
+        gpu.present()
+        if profiler:
+            profiler.mark("flip")
+        return
+    if dirty_renderer:
+        dirty_renderer.begin(screen, WHITE)
+    else:
+        screen.fill(WHITE)
+
+    lag = 1.0 - alpha
+    moving_rects = [draw_shooter(interpolated_shooter_x(alpha), shooter_y)]
+    bullet_lag = round(BULLET_SPEED * lag)
+    for bullet in sim.bullets:
+        moving_rects.append(draw_bullet(bullet.move(0, bullet_lag) if bullet_lag else bullet))
+    balloon_rects = balloon_atlas.draw(screen, sim.balloons, doreturn=dirty_renderer is not None, lag=lag)
+
+    hud_fields = draw_hud()
+    if profiler and profiler.overlay:
+        # Redrawn every frame, so it is treated like a moving object
+        refresh_profiler_lines()
+        moving_rects.append(draw_profiler_overlay())
+
+    if profiler:
+        profiler.mark("draw")
+    if dirty_renderer:
+        dirty_renderer.present(screen, moving_rects + balloon_rects, hud_fields)
+    else:
+        pygame.display.flip()
+    if profiler:
+        profiler.mark("flip")
+
+def draw_game_textures(alpha=1.0):
+    # The playing screen on the texture renderer. Everything is drawn again
+    # every frame (the renderer starts from a cleared target); only the HUD
+    # layer is re-rendered in software, when one of its values changed.
+    lag = 1.0 - alpha
+    gpu.draw_sprite(shooter_sprite, (interpolated_shooter_x(alpha), shooter_y - 5))
+    bullet_lag = round(BULLET_SPEED * lag)
+    bullets = sim.bullets
+    if bullet_lag:
+        bullets = [bullet.move(0, bullet_lag) for bullet in bullets]
+    gpu.fill_rects(BLACK, bullets)
+    gpu.draw_balloons(balloon_atlas, sim.balloons, lag)
+
+    overlay = profiler is not None and profiler.overlay
+    if overlay:
+        refresh_profiler_lines()
+    hud_key = (sim.score, sim.lives, sim.shooter_speed, sim.selected_difficulty,
+               tuple(profiler_lines) if overlay else None)
+    gpu.draw_layer("hud", hud_key, draw_hud_layer)
+
+def draw_hud_layer(surface):
+    draw_hud(surface)
+    if profiler and profiler.overlay:
+        draw_profiler_overlay(surface)
+
+def draw_hud(surface=None):
+    # Returns (name, value, rect) for each field, for the dirty-rect renderer
+    if surface is None:
+        surface = screen
+    fields = []
+    rect = display_text(f"Score: {sim.score}", font_small, BLACK, (80, 30), surface)
+    fields.append(("score", sim.score, rect))
+    lives_text = render_text(font_small, "Lives:", BLACK)
+    lives_rect = lives_text.get_rect(topright=(WIDTH - 130, 15))
+    surface.blit(lives_text, lives_rect)
+    fields.append(("lives_label", None, lives_rect))
+    for i in range(sim.lives):
+         heart_x = WIDTH - 110 + (i * 25)
+         pygame.draw.circle(surface, RED, (heart_x, 30), 10)
+    fields.append(("lives", sim.lives, HEARTS_RECT))
+
+    rect = display_text(f"Speed: {sim.shooter_speed}", font_small, BLACK, (WIDTH // 2, 30), surface)
+    fields.append(("speed", sim.shooter_speed, rect))
+    # Display selected difficulty instead of level
+    if sim.selected_difficulty:
+        rect = display_text(f"Difficulty: {sim.selected_difficulty}", font_small, BLACK, (WIDTH // 2, 60), surface)
+        fields.append(("difficulty", sim.selected_difficulty, rect))
+    return fields
+
+def refresh_profiler_lines():
+    # The overlay's numbers change every PROFILER_REFRESH_FRAMES frames
+    global profiler_lines
+    if not profiler_lines or profiler.frames % PROFILER_REFRESH_FRAMES == 0:
+        stats = profiler.stats(PROFILER_WINDOW)
+        balloons, bullets = profiler.entity_counts()
+        profiler_lines = ["phase    p50    p95    p99 ms"]
+        for phase, (p50, p95, p99) in stats.items():
+            profiler_lines.append(f"{phase:<6} {p50:6.2f} {p95:6.2f} {p99:6.2f}")
+        profiler_lines.append(f"balloons {balloons}  bullets {bullets}")
+        if audio:
+            sound = audio.stats()
+            profiler_lines.append(f"voices {sound['busy']}/{sound['voices']}  merged {sound['coalesced']}  "
+                                  f"stolen {sound['stolen']}")
+        if gpu:
+            stats = gpu.stats()
+            profiler_lines.append(f"renderer {stats['driver']}  uploads {stats['uploads']}")
+
+def draw_profiler_overlay(surface=None):
+    # Per-phase p50/p95/p99 and entity counts in the bottom-left corner
+    if surface is None:
+        surface = screen
+    line_height = font_tiny.get_linesize()
+    rect = pygame.Rect(5, HEIGHT - 5 - line_height * len(profiler_lines), 300, line_height * len(profiler_lines))
+    surface.fill(LIGHT_GRAY, rect)
+    y = rect.y
+    for line in profiler_lines:
+        surface.blit(render_text(font_tiny, line, BLACK), (rect.x + 4, y))
+        y += line_height
+    return rect
+
+def capture_pause_backdrop():
+    # Freeze the last gameplay frame with the grey overlay blended in once,
+    # so redrawing the pause screen is a plain blit
+    global pause_backdrop, pause_overlay
+    if gpu:
+        # The texture renderer redraws the game and blends the overlay instead
+        return
+    if pause_overlay is None:
+        pause_overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        pause_overlay.fill(PAUSE_OVERLAY)
+    pause_backdrop = screen.copy()
+    pause_backdrop.blit(pause_overlay, (0, 0))
+
+def draw_pause_screen():
+    if gpu:
+        gpu.clear(WHITE)
+        draw_game_textures()
+        gpu.fill(PAUSE_OVERLAY)
+        gpu.draw_layer("pause", (resume_button.is_hovered, quit_button_pause.is_hovered), draw_pause_menu)
+        gpu.present()
+        return
+    screen.blit(pause_backdrop, (0, 0))
+    draw_pause_menu(screen)
+    pygame.display.flip()
+
+def draw_pause_menu(surface):
+    display_text("Paused", font_large, BLACK, (WIDTH // 2, HEIGHT // 2 - 100), surface)
+    resume_button.draw(surface)
+    quit_button_pause.draw(surface)
+    display_text("Press P to Resume, R to Rewind or ESC to Quit", font_tiny, BLACK, (WIDTH // 2, HEIGHT // 2 + 100), surface)
+
+def draw_game_over_screen():
+    screen.fill(GRAY)
+    display_text("Game Over!", font_large, RED, (WIDTH // 2, HEIGHT // 2 - 200))
+    display_text(f"Final Score: {sim.score}", font_medium, BLACK, (WIDTH // 2, HEIGHT // 2 - 130))
+    if sim.selected_difficulty:
+         display_text(f"(Difficulty: {sim.selected_difficulty})", font_small, BLACK, (WIDTH // 2, HEIGHT // 2 - 50))
+
+    is_new_high = sim.score > sim.high_score and sim.score > 0
+    final_high_score = max(sim.score, sim.high_score) if is_new_high else sim.high_score
+
+    if is_new_high:
+         display_text(f"New High Score!", font_medium, BLUE, (WIDTH // 2, HEIGHT // 2 + 210))
+         display_text(f"High Score: {final_high_score}", font_small, BLACK, (WIDTH // 2, HEIGHT // 2 + 250))
+    else:
+         display_text(f"High Score: {final_high_score}", font_small, BLACK, (WIDTH // 2, HEIGHT // 2 + 250))
+
+    restart_button.draw(screen) # Button now says "New Game" and goes to start screen
+    quit_button_game_over.draw(screen)
+    flip_screen()
+
+# --- Main Game Loop ---
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Balloon Shooter")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only redraw and push the changed parts of the playing screen")
+    parser.add_argument("--renderer", choices=("surface", "texture"), default="surface",
+                        help="draw on the display surface (default) or through SDL's texture renderer")
+    parser.add_argument("--render-driver", metavar="NAME",
+                        help="SDL render driver for --renderer texture (e.g. opengl, software); "
+                             "default: the first accelerated one that works, else software")
+    parser.add_argument("--seed", type=int,
+                        help="play a deterministic session with this RNG seed")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record the session to a replay file (see replay.py)")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each phase of the main loop; F3 toggles the overlay")
+    parser.add_argument("--profile-out", metavar="FILE",
+                        help="write the profile on exit (.json = Chrome trace, else CSV); implies --profile")
+    parser.add_argument("--profile-frames", type=int, default=3600,
+                        help="number of most recent frames the profiler keeps")
+    parser.add_argument("--fps", type=int, default=FPS,
+                        help=f"render rate cap, 0 for uncapped (game logic always ticks at {FPS} Hz)")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long each startup step took")
+    parser.add_argument("--telemetry-dir", default=TELEMETRY_DIR,
+                        help="directory the gameplay and frame-time event logs are written to")
+    parser.add_argument("--no-telemetry", action="store_true",
+                        help="don't record telemetry (game events are printed instead)")
+    args = parser.parse_args(argv)
+    if args.dirty_rects and args.renderer == "texture":
+        parser.error("--dirty-rects only applies to --renderer surface")
+    if args.record and args.seed is not None and not 0 <= args.seed <= MAX_SEED:
+        parser.error(f"--seed must be between 0 and {MAX_SEED} to --record")
+    return args
+
+def frame_input(keys):
+    # Held arrow keys plus the presses queued since the last tick
+    return FrameInput(keys[pygame.K_LEFT], keys[pygame.K_RIGHT], "fire" in pressed,
+                      "speed_up" in pressed, "speed_down" in pressed, "pause" in pressed)
+
+def run_tick(inputs):
+    # One fixed-length simulation step, plus its sounds
+    global prev_shooter_x
+    if recorder:
+        recorder.record_input(inputs)
+    prev_shooter_x = sim.shooter_x
+    result = sim.step(inputs, FRAME_MS)
+    if snapshots and sim.game_state == "playing":
+        snapshots.record(sim)
+    if audio:
+        # Started (and merged with the rest of the frame's) in audio.flush()
+        if result.fired:
+            audio.play("shoot")
+        if result.popped:
+            audio.play("pop", len(result.popped))
+
+def main(argv=None):
+    global dirty_renderer, recorder, profiler, profiler_out, startup_report, telemetry, frame_stats, snapshots
+    args = parse_args(argv)
+    seed = args.seed
+    if args.record and seed is None:
+        # Recording needs a deterministic session
+        seed = random.randrange(2**63)
+    startup_report = args.startup_report
+    if not args.no_telemetry:
+        telemetry = Telemetry(args.telemetry_dir)
+        frame_stats = FrameStats(telemetry)
+        telemetry.emit("session", seed=seed, fps=args.fps, dirty_rects=args.dirty_rects, renderer=args.renderer)
+    if not args.record:
+        # Restoring a snapshot mid-session would break a replay
+        snapshots = SnapshotRing()
+    startup = init_game(seed, StartupTimer(STARTUP_NS), telemetry=telemetry,
+                        renderer=args.renderer, render_driver=args.render_driver)
+    if startup_report:
+        print(startup.report())
+    if gpu:
+        print(f"Rendering with SDL's {gpu.driver} renderer")
+    if args.dirty_rects:
+        dirty_renderer = DirtyRectRenderer()
+    if args.record:
+        recorder = ReplayRecorder(args.record, seed)
+    if args.profile or args.profile_out:
+        profiler = FrameProfiler(args.profile_frames)
+        profiler_out = args.profile_out
+    global static_screen_dirty, accumulator_ms
+    # Fixed timestep: the simulation advances in FRAME_MS ticks, as many as
+    # the elapsed time calls for (at most MAX_CATCH_UP_TICKS per frame), and
+    # frames are drawn at whatever rate --fps allows, interpolated between
+    # the last two ticks. Key presses wait for the next tick to use them.
+    accumulator_ms = 0
+    alpha = 1.0
+    while running:
+        if profiler:
+            profiler.begin_frame()
+
+        # --- Event Handling ---
+        if sim.game_state == "playing":
+            events = pygame.event.get()
+        else:
+            events = wait_for_events(IDLE_WAIT_MS)
+            if profiler:
+                profiler.mark("idle")
+        for event in events:
+            dispatcher.dispatch(sim.game_state, event)
+        update_hover(pygame.mouse.get_pos())
+
+        if profiler:
+            profiler.mark("events")
+
+        # --- Game Logic & Drawing based on State ---
+        if sim.game_state == "paused":
+            # Only waits for the resume key; no time passes. Mouse moves and
+            # idle wake-ups mustn't step the sim (sim.frame counts ticks)
+            if "pause" in pressed:
+                run_tick(frame_input(pygame.key.get_pressed()))
+            pressed.clear()
+        elif sim.game_state == "playing":
+            keys = pygame.key.get_pressed()
+            ticks = 0
+            while accumulator_ms >= FRAME_MS and ticks < MAX_CATCH_UP_TICKS and sim.game_state == "playing":
+                run_tick(frame_input(keys))
+                pressed.clear()
+                accumulator_ms -= FRAME_MS
+                ticks += 1
+            if accumulator_ms >= FRAME_MS:
+                # Too far behind (or the game paused/ended mid-frame): drop
+                # the backlog, so the game slows down instead of spiralling
+                accumulator_ms %= FRAME_MS
+            alpha = accumulator_ms / FRAME_MS
+        else:
+            # Presses made on the menus don't carry into the next game
+            pressed.clear()
+        if audio:
+            audio.flush()
+        if profiler:
+            profiler.mark("logic")
+
+        if sim.game_state == "playing":
+            draw_game_screen(alpha)
+        elif static_screen_dirty:
+            static_screen_dirty = False
+            if sim.game_state == "start":
+                draw_start_screen()
+            elif sim.game_state == "paused":
+                draw_pause_screen()
+            elif sim.game_state == "game_over":
+                draw_game_over_screen()
+            if profiler:
+                profiler.mark("draw")
+
+        # --- Frame Rate Control ---
+        if sim.game_state == "playing":
+            frame_ms = clock.tick(args.fps)
+            accumulator_ms += frame_ms
+        else:
+            # Static screens block in wait_for_events instead; restart the
+            # clock so idle time isn't counted as one long frame
+            frame_ms = clock.tick()
+            accumulator_ms = 0
+        if frame_stats:
+            frame_stats.add(frame_ms, sim.game_state, sim.store.balloon_count(), sim.store.bullet_count())
+        if profiler:
+            profiler.mark("tick")
+            profiler.end_frame(sim.store.balloon_count(), sim.store.bullet_count())
+
+    # --- Cleanup ---
+    quit_game()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# --- Batched environments for bots and balance runs ---
+# BatchEnv runs N independent games in lockstep. Every game's state lives
+# in shared NumPy arrays (one row per game), so a single step() call moves
+# all of them at once:
+#
+#     env = BatchEnv(1024, difficulties="Hard", seed=1)
+#     obs = env.reset()
+#     while training:
+#         obs, rewards, dones = env.step(actions)   # actions: (N, 6) bools
+#
+# Rules follow Simulation in deterministic mode (frame-based spawning, the
+# same movement, truncated-rect pre-check plus circle test, and scoring),
+# with these differences:
+#   * each game holds at most max_balloons balloons and max_bullets bullets;
+#     a spawn or shot with no free slot is skipped;
+#   * balloons are matched to bullets in slot order, not spawn order, so
+#     when two balloons touch the same bullet the winner may differ
+#     (matching is entity_store.match_hits on slot indices);
+#   * there is no pause and no menu: a game that loses its last life is
+#     reset on the spot with the same difficulty (like reset_game).
+#
+# Needs NumPy.
+
+import numpy as np
+
+from settings import (
+    WIDTH, HEIGHT, INITIAL_SHOOTER_SPEED, BULLET_SPEED, INITIAL_LIVES,
+    DIFFICULTY_LEVELS, BALLOON_TYPES, balloon_type_keys, balloon_probabilities,
+    shooter_width, shooter_y, bullet_width, bullet_height,
+)
+from simulation import FrameInput, FRAME_MS
+from entity_store import match_hits
+
+# Action columns, in FrameInput order
+ACTION_FIELDS = FrameInput._fields
+LEFT, RIGHT, FIRE, SPEED_UP, SPEED_DOWN, PAUSE = range(len(ACTION_FIELDS))
+
+TYPE_RADIUS = np.array([BALLOON_TYPES[key]['radius'] for key in balloon_type_keys], dtype=np.int32)
+TYPE_SCORE = np.array([BALLOON_TYPES[key]['base_score'] for key in balloon_type_keys], dtype=np.int32)
+TYPE_CDF = np.cumsum(np.array(balloon_probabilities) / sum(balloon_probabilities))
+
+START_X = WIDTH // 2 - shooter_width // 2
+BULLET_X_OFFSET = shooter_width // 2 - bullet_width // 2
+BULLET_Y = shooter_y - bullet_height
+
+
+class BatchEnv:
+    def __init__(self, num_envs, difficulties="Medium", seed=None, max_balloons=16, max_bullets=32):
+        # difficulties: one DIFFICULTY_LEVELS name for all games, or one per game
+        n = self.num_envs = num_envs
+        k = self.max_balloons = max_balloons
+        m = self.max_bullets = max_bullets
+        self.rng = np.random.default_rng(seed)
+
+        if isinstance(difficulties, str):
+            difficulties = [difficulties] * n
+        if len(difficulties) != n:
+            raise ValueError(f"Expected {n} difficulties, got {len(difficulties)}")
+        self.difficulties = list(difficulties)
+        params = [DIFFICULTY_LEVELS[name] for name in self.difficulties]
+        self.spawn_delay = np.array([p['spawn_delay'] for p in params], dtype=np.float64)
+        self.min_speed = np.array([p['min_speed'] for p in params], dtype=np.float64)
+        self.max_speed = np.array([p['max_speed'] for p in params], dtype=np.float64)
+        self.score_multiplier = np.array([p['score_multiplier'] for p in params], dtype=np.float64)
+
+        # Per-game state
+        self.shooter_x = np.empty(n, dtype=np.int64)
+        self.shooter_speed = np.empty(n, dtype=np.int64)
+        self.lives = np.empty(n, dtype=np.int64)
+        self.score = np.empty(n, dtype=np.int64)
+        self.spawn_elapsed = np.empty(n, dtype=np.float64)
+        self.frames = np.empty(n, dtype=np.int64)
+
+        # Balloon and bullet slots
+        self.bx = np.zeros((n, k), dtype=np.int64)
+        self.by = np.zeros((n, k), dtype=np.float64)
+        self.bspeed = np.zeros((n, k), dtype=np.float64)
+        self.bradius = np.zeros((n, k), dtype=np.int64)
+        self.bscore = np.zeros((n, k), dtype=np.int64)
+        self.balive = np.zeros((n, k), dtype=bool)
+        self.ux = np.zeros((n, m), dtype=np.int64)
+        self.uy = np.zeros((n, m), dtype=np.int64)
+        self.ualive = np.zeros((n, m), dtype=bool)
+
+        # Results of the episodes that ended on the last step (valid where done)
+        self.final_score = np.zeros(n, dtype=np.int64)
+        self.final_frames = np.zeros(n, dtype=np.int64)
+        # Stats
+        self.episodes_done = 0
+        self.total_frames = 0
+
+        self.reset()
+
+    # --- Resetting ---
+    def reset(self, mask=None):
+        # Reset the games selected by the boolean mask (all by default) and
+        # return the observations
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        self.shooter_x[mask] = START_X
+        self.shooter_speed[mask] = INITIAL_SHOOTER_SPEED
+        self.lives[mask] = INITIAL_LIVES
+        self.score[mask] = 0
+        self.spawn_elapsed[mask] = 0
+        self.frames[mask] = 0
+        self.balive[mask] = False
+        self.ualive[mask] = False
+        return self.observe()
+
+    # --- Stepping ---
+    def step(self, actions):
+        # actions: (N, 6) array of bools in FrameInput order, or (N,) ints
+        # using replay.py's bit layout. Returns (observations, rewards, dones);
+        # finished games are reset before returning.
+        actions = np.asarray(actions)
+        if actions.ndim == 1:
+            actions = (actions[:, None] >> np.arange(len(ACTION_FIELDS))) & 1
+        actions = actions.astype(bool)
+
+        self.frames += 1
+        self.total_frames += self.num_envs
+
+        # Key presses first, like Simulation.step
+        self._fire(actions[:, FIRE])
+        self.shooter_speed += actions[:, SPEED_UP]
+        self.shooter_speed = np.where(actions[:, SPEED_DOWN],
+                                      np.maximum(1, self.shooter_speed - 1), self.shooter_speed)
+
+        self.spawn_elapsed += FRAME_MS
+        due = self.spawn_elapsed >= self.spawn_delay
+        self.spawn_elapsed[due] -= self.spawn_delay[due]
+        self._spawn(due)
+
+        # Shooter movement
+        x = self.shooter_x
+        x = np.where(actions[:, LEFT] & (x > 0), x - self.shooter_speed, x)
+        x = np.where(actions[:, RIGHT] & (x < WIDTH - shooter_width), x + self.shooter_speed, x)
+        self.shooter_x = x
+
+        # Bullets up, balloons down
+        self.uy[self.ualive] -= BULLET_SPEED
+        self.ualive &= self.uy >= 0
+        self.by[self.balive] += self.bspeed[self.balive]
+        missed = self.balive & (self.by > HEIGHT + self.bradius)
+        self.balive &= ~missed
+        self.lives -= missed.sum(axis=1)
+
+        rewards = self._collide()
+        self.score += rewards
+
+        dones = self.lives < 0
+        if dones.any():
+            self.final_score[dones] = self.score[dones]
+            self.final_frames[dones] = self.frames[dones]
+            self.episodes_done += int(dones.sum())
+            self.reset(dones)
+        return self.observe(), rewards, dones
+
+    def _free_slots(self, alive, wanted):
+        # (games, slots) for the games in `wanted` that have a free slot
+        free = ~alive
+        games = np.flatnonzero(wanted & free.any(axis=1))
+        return games, free[games].argmax(axis=1)
+
+    def _fire(self, fire):
+        games, slots = self._free_slots(self.ualive, fire)
+        self.ux[games, slots] = self.shooter_x[games] + BULLET_X_OFFSET
+        self.uy[games, slots] = BULLET_Y
+        self.ualive[games, slots] = True
+
+    def _spawn(self, due):
+        games, slots = self._free_slots(self.balive, due)
+        if games.size == 0:
+            return
+        rng = self.rng
+        kinds = np.searchsorted(TYPE_CDF, rng.random(games.size), side='right')
+        kinds = np.minimum(kinds, len(TYPE_CDF) - 1)
+        radius = TYPE_RADIUS[kinds]
+        self.bx[games, slots] = rng.integers(radius, WIDTH - radius + 1)
+        self.by[games, slots] = -radius
+        self.bspeed[games, slots] = rng.uniform(self.min_speed[games], self.max_speed[games])
+        self.bradius[games, slots] = radius
+        self.bscore[games, slots] = TYPE_SCORE[kinds]
+        self.balive[games, slots] = True
+
+    def _collide(self):
+        # Pair every live balloon with every live bullet of the same game
+        # (both lists come out of nonzero() grouped by game), then run the
+        # same narrow phase as the other backends on the flat pair list.
+        rewards = np.zeros(self.num_envs, dtype=np.int64)
+        b_game, b_slot = np.nonzero(self.balive)
+        u_game, u_slot = np.nonzero(self.ualive)
+        if b_game.size == 0 or u_game.size == 0:
+            return rewards
+        u_count = np.bincount(u_game, minlength=self.num_envs)
+        u_start = np.cumsum(u_count) - u_count
+
+        per_balloon = u_count[b_game]
+        total = int(per_balloon.sum())
+        if total == 0:
+            return rewards
+        bi = np.repeat(np.arange(b_game.size), per_balloon)
+        offsets = np.arange(total) - np.repeat(np.cumsum(per_balloon) - per_balloon, per_balloon)
+        ui = np.repeat(u_start[b_game], per_balloon) + offsets
+
+        g, k = b_game[bi], b_slot[bi]
+        m = u_slot[ui]
+        x = self.bx[g, k]
+        y = self.by[g, k]
+        r = self.bradius[g, k]
+        ux = self.ux[g, m]
+        uy = self.uy[g, m]
+        top = np.trunc(y - r)
+        dx = x - (ux + bullet_width // 2)
+        dy = y - (uy + bullet_height // 2)
+        hit = ((x - r < ux + bullet_width) & (ux < x + r)
+               & (top < uy + bullet_height) & (uy < top + 2 * r)
+               & (dx * dx + dy * dy < (r + bullet_width) ** 2))
+        if not hit.any():
+            return rewards
+
+        # Indices into the flat live lists are ordered by (game, slot), so
+        # matching stays within a game and follows slot order
+        popped, used = match_hits(bi[hit], ui[hit])
+        pg, pk = b_game[popped], b_slot[popped]
+        gained = np.trunc(self.bscore[pg, pk] * self.score_multiplier[pg]).astype(np.int64)
+        np.add.at(rewards, pg, gained)
+        self.balive[pg, pk] = False
+        self.ualive[u_game[used], u_slot[used]] = False
+        return rewards
+
+    # --- Observations ---
+    def observation_size(self):
+        return 4 + 4 * self.max_balloons
+
+    def observe(self):
+        # (N, 4 + 4 * max_balloons) float32 rows:
+        #   shooter_x, shooter_speed, lives, live bullet count,
+        #   then x, y, radius, alive for every balloon slot
+        n, k = self.num_envs, self.max_balloons
+        obs = np.empty((n, self.observation_size()), dtype=np.float32)
+        obs[:, 0] = self.shooter_x
+        obs[:, 1] = self.shooter_speed
+        obs[:, 2] = self.lives
+        obs[:, 3] = self.ualive.sum(axis=1)
+        balloons = obs[:, 4:].reshape(n, k, 4)
+        balloons[:, :, 0] = self.bx
+        balloons[:, :, 1] = self.by
+        balloons[:, :, 2] = self.bradius
+        balloons[:, :, 3] = self.balive
+        return obs
@@ -0,0 +1,257 @@
+# --- Benchmark suite ---
+# Runs the real update and draw paths (Simulation.step / run_game_logic,
+# spawn_balloon, draw_game_screen, draw_balloon) through scripted stress
+# scenarios on SDL's dummy video driver, so no window or display is needed:
+#
+#     python bench.py                                   # all scenarios
+#     python bench.py --output bench_baseline.json      # record a baseline
+#     python bench.py --compare bench_baseline.json --threshold 0.2
+#
+# For every scenario it reports:
+#   * time per frame (mean / p50 / p95 ms) over --frames timed frames;
+#   * Python heap allocated per frame (KB above the level at frame start,
+#     from tracemalloc, over a separate, shorter --alloc-frames pass since
+#     tracing slows everything down) and the peak traced heap;
+# Pygame surfaces live in SDL's own memory and aren't traced.
+#
+# Results are written as JSON. With --compare, a scenario whose p50 frame
+# time or allocation per frame grows by more than --threshold (a fraction)
+# over the baseline counts as a regression and the exit status is 1.
+
+import os
+
+# Must be set before pygame opens the display or mixer
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tracemalloc
+from time import perf_counter_ns
+
+import pygame
+
+import ballon_game as game
+from settings import WIDTH, HEIGHT, WHITE, INITIAL_LIVES, BALLOON_TYPES, attractive_colors, shooter_y
+from simulation import Simulation, FrameInput, NO_INPUT
+from policies import AimPolicy
+from profiler import percentile
+
+RESULTS_VERSION = 1
+MISS_ALLOWANCE = 10**9
+
+
+class Scenario:
+    def __init__(self, name, difficulty="Medium", balloons=0, spray=0, spawning=True,
+                 policy=None, warmup=60, draw="atlas", max_frames=None):
+        self.name = name
+        self.difficulty = difficulty
+        self.balloons = balloons     # keep this many balloons on screen (topped up with spawn_balloon)
+        self.spray = spray           # extra bullets fired from random x positions every frame
+        self.spawning = spawning     # regular timed spawning from the difficulty
+        self.policy = policy         # policy(sim) -> FrameInput; None stands still
+        self.warmup = warmup         # untimed frames before measuring
+        self.draw = draw             # "atlas" (draw_game_screen) or "primitive" (draw_balloon)
+        self.max_frames = max_frames # cap on timed frames for the slow scenarios
+
+
+def sweeping_fire(sim):
+    # Fire every frame while sweeping across the screen
+    going_right = (sim.frame // 90) % 2 == 0
+    return FrameInput(left=not going_right, right=going_right, fire=True)
+
+
+AIM = AimPolicy()
+
+SCENARIOS = [
+    Scenario("empty", spawning=False),
+    Scenario("balloons_1k", balloons=1_000, spawning=False),
+    Scenario("balloons_1k_primitive", balloons=1_000, spawning=False, draw="primitive"),
+    Scenario("balloons_10k", balloons=10_000, spawning=False, max_frames=100),
+    Scenario("balloons_50k", balloons=50_000, spawning=False, warmup=10, max_frames=20),
+    Scenario("bullet_spray", balloons=300, spray=10, policy=sweeping_fire),
+    Scenario("hard_steady", difficulty="Hard", policy=AIM, warmup=600),
+]
+
+
+# --- Running a scenario ---
+def setup(scenario, backend, seed):
+    sim = Simulation(backend=backend, seed=seed)
+    sim.start_game(scenario.difficulty)
+    if not scenario.spawning:
+        sim.balloon_spawn_delay = 0
+    # Start with the field already full, spread over the screen
+    rng = sim.rng
+    for _ in range(scenario.balloons):
+        info = BALLOON_TYPES[rng.choice(list(BALLOON_TYPES))]
+        radius = info['radius']
+        sim.store.add_balloon(rng.randint(radius, WIDTH - radius), rng.uniform(-radius, HEIGHT),
+                              rng.uniform(sim.balloon_min_speed, sim.balloon_max_speed),
+                              rng.choice(attractive_colors), radius, info['base_score'])
+    game.sim = sim
+    game.dirty_renderer = None
+    return sim
+
+
+def draw_primitive():
+    # The playing screen with every balloon drawn by draw_balloon
+    sim = game.sim
+    game.screen.fill(WHITE)
+    game.draw_shooter(sim.shooter_x, shooter_y)
+    for bullet in sim.bullets:
+        game.draw_bullet(bullet)
+    for balloon in sim.balloons:
+        game.draw_balloon(balloon)
+    game.draw_hud()
+    game.flip_screen()
+
+
+def run_frame(sim, scenario):
+    # Misses must not end the run, but the HUD should still draw the usual
+    # number of hearts
+    sim.lives = MISS_ALLOWANCE
+    sim.step(scenario.policy(sim) if scenario.policy else NO_INPUT)
+    sim.lives = INITIAL_LIVES
+    store = sim.store
+    for _ in range(scenario.balloons - store.balloon_count()):
+        sim.spawn_balloon()
+    if scenario.spray:
+        rng = sim.rng
+        for _ in range(scenario.spray):
+            store.add_bullet(rng.randrange(WIDTH), shooter_y)
+    if scenario.draw == "primitive":
+        draw_primitive()
+    else:
+        game.draw_game_screen()
+    pygame.event.pump()
+
+
+def time_frames(sim, scenario, frames):
+    times = []
+    for _ in range(frames):
+        start = perf_counter_ns()
+        run_frame(sim, scenario)
+        times.append(perf_counter_ns() - start)
+    return times
+
+
+def trace_frames(sim, scenario, frames):
+    # (mean KB allocated per frame, peak traced KB)
+    allocated = []
+    tracemalloc.start()
+    try:
+        for _ in range(frames):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            run_frame(sim, scenario)
+            allocated.append(tracemalloc.get_traced_memory()[1] - before)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return statistics.fmean(allocated) / 1024, peak / 1024
+
+
+def run_scenario(scenario, args):
+    sim = setup(scenario, args.backend, args.seed)
+    for _ in range(scenario.warmup):
+        run_frame(sim, scenario)
+    gc.collect()
+    frames = min(args.frames, scenario.max_frames or args.frames)
+    times = sorted(time_frames(sim, scenario, frames))
+    alloc_kb, peak_kb = trace_frames(sim, scenario, min(args.alloc_frames, frames))
+    return {
+        'frames': frames,
+        'time_mean_ms': round(statistics.fmean(times) / 1e6, 4),
+        'time_p50_ms': round(percentile(times, 0.5) / 1e6, 4),
+        'time_p95_ms': round(percentile(times, 0.95) / 1e6, 4),
+        'alloc_kb_per_frame': round(alloc_kb, 2),
+        'peak_traced_kb': round(peak_kb, 1),
+        'balloons': sim.store.balloon_count(),
+        'bullets': sim.store.bullet_count(),
+        'pools': sim.store.pool_stats(),
+    }
+
+
+# --- Comparing against a baseline ---
+COMPARED_METRICS = ('time_p50_ms', 'alloc_kb_per_frame')
+
+
+def find_regressions(results, baseline, threshold):
+    regressions = []
+    for name, result in results['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if old[metric] > 0 and result[metric] > old[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {old[metric]} -> {result[metric]} "
+                                   f"(+{result[metric] / old[metric] - 1:.0%})")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Balloon Shooter benchmarks.")
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO',
+                        help=f"scenarios to run (default all: {', '.join(s.name for s in SCENARIOS)})")
+    parser.add_argument('--frames', type=int, default=300, help="timed frames per scenario")
+    parser.add_argument('--alloc-frames', type=int, default=30, help="traced frames per scenario")
+    parser.add_argument('--backend', default='list', help="entity backend (list, numpy, ...)")
+    parser.add_argument('--renderer', choices=('surface', 'texture'), default='surface',
+                        help="render backend the playing screen is drawn with")
+    parser.add_argument('--render-driver', help="SDL render driver for --renderer texture")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='bench_results.json', help="where to write the results")
+    parser.add_argument('--compare', metavar='BASELINE', help="results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown / allocation growth as a fraction (default 0.25)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    known = {scenario.name: scenario for scenario in SCENARIOS}
+    unknown = [name for name in args.scenarios if name not in known]
+    if unknown:
+        print(f"Unknown scenario(s): {', '.join(unknown)}")
+        return 2
+    selected = [known[name] for name in args.scenarios] if args.scenarios else SCENARIOS
+
+    game.init_game(leaderboard_path=None, renderer=args.renderer, render_driver=args.render_driver)
+    results = {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'renderer': game.gpu.driver if game.gpu else 'surface',
+        'scenarios': {},
+    }
+    print(f"{'scenario':<24}{'mean ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'alloc KB':>10}{'peak KB':>10}")
+    for scenario in selected:
+        result = results['scenarios'][scenario.name] = run_scenario(scenario, args)
+        print(f"{scenario.name:<24}{result['time_mean_ms']:>9.3f}{result['time_p50_ms']:>9.3f}"
+              f"{result['time_p95_ms']:>9.3f}{result['alloc_kb_per_frame']:>10.1f}{result['peak_traced_kb']:>10.0f}")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions past {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions past {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
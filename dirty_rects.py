@@ -0,0 +1,76 @@
+# --- Dirty-rectangle renderer for the playing screen ---
+# Instead of filling and flipping the whole window every frame, only the
+# areas that changed are cleared and pushed to the display:
+#
+#   * moving objects (shooter, bullets, balloons): last frame's rects are
+#     cleared, and both last and this frame's rects are pushed;
+#   * HUD fields: redrawn every frame (cheap), but only pushed when their
+#     value changed.
+#
+# When too many rects are dirty (or they cover too much of the screen) a
+# single full flip is cheaper than many small updates, so it falls back to
+# that automatically.
+
+import pygame
+
+
+class DirtyRectRenderer:
+    def __init__(self, max_rects=150, max_area_fraction=0.4):
+        self.max_rects = max_rects
+        self.max_area_fraction = max_area_fraction
+        self.moving_rects = []   # rects of moving objects drawn last frame
+        self.hud = {}            # field name -> (value, rect) drawn last frame
+        self.full_redraw = True
+        # Stats
+        self.partial_frames = 0
+        self.full_frames = 0
+
+    def invalidate(self):
+        # Next frame repaints everything (e.g. after another screen was shown)
+        self.full_redraw = True
+
+    def begin(self, surface, background):
+        # Erase everything drawn last frame before the new frame is drawn
+        if self.full_redraw:
+            surface.fill(background)
+            return
+        for rect in self.moving_rects:
+            surface.fill(background, rect)
+        for _, rect in self.hud.values():
+            surface.fill(background, rect)
+
+    def present(self, surface, moving_rects, hud_fields):
+        # moving_rects: rects of objects drawn this frame
+        # hud_fields: (name, value, rect) for each HUD field drawn this frame
+        dirty = self.moving_rects + moving_rects
+        hud = {}
+        for name, value, rect in hud_fields:
+            hud[name] = (value, rect)
+            old = self.hud.get(name)
+            if old is None:
+                dirty.append(rect)
+            elif old[0] != value:
+                dirty.append(old[1].union(rect))
+        # Fields that disappeared still need their old area pushed
+        for name, (_, rect) in self.hud.items():
+            if name not in hud:
+                dirty.append(rect)
+
+        self.moving_rects = moving_rects
+        self.hud = hud
+
+        if self.full_redraw or self._too_dirty(surface, dirty):
+            self.full_redraw = False
+            self.full_frames += 1
+            pygame.display.flip()
+        else:
+            self.partial_frames += 1
+            pygame.display.update(dirty)
+
+    def _too_dirty(self, surface, dirty):
+        if len(dirty) > self.max_rects:
+            return True
+        area = 0
+        for rect in dirty:
+            area += rect.w * rect.h
+        return area > self.max_area_fraction * surface.get_width() * surface.get_height()
@@ -0,0 +1,84 @@
+# --- Entity classes and free-list pools ---
+# Balloons used to be 6-key dicts and every shot a fresh pygame.Rect, all
+# thrown away on a pop or miss, so a long session kept the allocator and
+# the garbage collector busy. Balloon is a compact __slots__ record, and
+# both balloons and bullet rects are handed out by a Pool that recycles
+# dead instances: once the pool has grown to the busiest moment of a game,
+# spawning and firing stop allocating altogether.
+
+
+class Balloon:
+    __slots__ = ('x', 'y', 'speed', 'color', 'radius', 'base_score')
+
+    def __init__(self, x=0, y=0, speed=0, color=None, radius=0, base_score=0):
+        self.x = x
+        self.y = y
+        self.speed = speed
+        self.color = color
+        self.radius = radius
+        self.base_score = base_score
+
+    def __repr__(self):
+        return (f"Balloon(x={self.x}, y={self.y}, speed={self.speed}, color={self.color}, "
+                f"radius={self.radius}, base_score={self.base_score})")
+
+
+class Pool:
+    # Free list of reusable objects made by factory(). `capacity` objects
+    # are created up front; when they are all in use the pool grows, and
+    # everything released is kept for reuse.
+    def __init__(self, factory, capacity=0):
+        self.factory = factory
+        self.free = [factory() for _ in range(capacity)]
+        self.capacity = capacity
+        # Stats
+        self.size = capacity      # objects owned (in use + free)
+        self.in_use = 0
+        self.high_water = 0       # most objects in use at once
+        self.grown = 0            # objects created after the initial capacity
+
+    def acquire(self):
+        if self.free:
+            obj = self.free.pop()
+        else:
+            obj = self.factory()
+            self.size += 1
+            self.grown += 1
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return obj
+
+    def acquire_many(self, count):
+        # Same as `count` acquire() calls, in one go
+        free = self.free
+        take = min(count, len(free))
+        objs = free[len(free) - take:]
+        del free[len(free) - take:]
+        if take < count:
+            objs.extend(self.factory() for _ in range(count - take))
+            self.size += count - take
+            self.grown += count - take
+        self.in_use += count
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return objs
+
+    def release(self, obj):
+        # obj must not be used by the caller afterwards
+        self.in_use -= 1
+        self.free.append(obj)
+
+    def release_all(self, objs):
+        self.in_use -= len(objs)
+        self.free.extend(objs)
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'size': self.size,
+            'in_use': self.in_use,
+            'free': len(self.free),
+            'high_water': self.high_water,
+            'grown': self.grown,
+        }
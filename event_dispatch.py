@@ -0,0 +1,71 @@
+# --- Event dispatch table ---
+# Handlers are registered per (game state, event type, key) and found with
+# a few dict lookups per event, instead of every event running through an
+# if/elif chain of state comparisons and every button:
+#
+#     dispatcher.on("playing", pygame.KEYDOWN, fire, key=pygame.K_SPACE)
+#     dispatcher.on(None, pygame.QUIT, quit)          # any state
+#     dispatcher.dispatch(sim.game_state, event)
+#
+# The key is event.key for keyboard events and event.button for mouse
+# buttons; a handler registered without one gets every event of its type.
+# filter_events(state) tells SDL to drop the event types nobody in that
+# state listens to, so they never reach the queue at all.
+
+import pygame
+
+# Event attribute used as the key, by event type
+KEY_ATTRIBUTES = {
+    pygame.KEYDOWN: 'key',
+    pygame.KEYUP: 'key',
+    pygame.MOUSEBUTTONDOWN: 'button',
+    pygame.MOUSEBUTTONUP: 'button',
+}
+
+
+class EventDispatcher:
+    def __init__(self, always_allowed=()):
+        # always_allowed: event types never filtered out, even without handlers
+        self.handlers = {}   # (state, event type, key) -> [handler(event), ...]
+        self.always_allowed = set(always_allowed)
+        # Stats
+        self.dispatched = 0
+        self.handled = 0
+
+    def on(self, state, event_type, handler, key=None):
+        # state None: every state; key None: every key / button
+        self.handlers.setdefault((state, event_type, key), []).append(handler)
+
+    def dispatch(self, state, event):
+        # Runs the handlers for any state first, then the state's own
+        self.dispatched += 1
+        handlers = self.handlers
+        event_type = event.type
+        attribute = KEY_ATTRIBUTES.get(event_type)
+        key = getattr(event, attribute) if attribute else None
+        for handler_state in (None, state):
+            matched = handlers.get((handler_state, event_type, None))
+            if matched:
+                self._run(matched, event)
+            if key is not None:
+                matched = handlers.get((handler_state, event_type, key))
+                if matched:
+                    self._run(matched, event)
+
+    def _run(self, matched, event):
+        self.handled += 1
+        for handler in matched:
+            handler(event)
+
+    def event_types(self, state):
+        # Event types with a handler in `state` (or in every state)
+        types = set(self.always_allowed)
+        for handler_state, event_type, _ in self.handlers:
+            if handler_state is None or handler_state == state:
+                types.add(event_type)
+        return types
+
+    def filter_events(self, state):
+        # Only let the event types `state` handles into the queue
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(sorted(self.event_types(state)))
@@ -0,0 +1,62 @@
+# --- Font resolution cache ---
+# pygame.font.SysFont scans every installed font (fc-list on Linux, the
+# registry on Windows) the first time it is called, which can take seconds.
+# FontCache only asks pygame to match a font name when it hasn't seen it
+# before and remembers the resulting file path in a small JSON file, so
+# later runs open the font file directly.
+#
+# A name of None means pygame's bundled default font, which needs no lookup
+# at all (SysFont(None, size) ends up there too).
+
+import json
+import os
+
+import pygame
+
+FONT_CACHE_FILE = "font_cache.json"
+
+
+class FontCache:
+    def __init__(self, path=FONT_CACHE_FILE):
+        self.path = path
+        self.paths = self._load()
+        self.changed = False
+        # Stats
+        self.lookups = 0   # names that had to be matched against the system fonts
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                paths = json.load(f)
+        except (IOError, ValueError):
+            return {}
+        return paths if isinstance(paths, dict) else {}
+
+    def resolve(self, name, bold=False, italic=False):
+        # Font file for a system font name (None if there's no match, which
+        # makes pygame use its default font, as SysFont does)
+        if name is None:
+            return None
+        key = f"{name}|{'b' if bold else ''}{'i' if italic else ''}"
+        if key in self.paths:
+            path = self.paths[key]
+            if path is None or os.path.exists(path):
+                return path
+        self.lookups += 1
+        path = pygame.font.match_font(name, bold, italic)
+        self.paths[key] = path
+        self.changed = True
+        return path
+
+    def font(self, name, size, bold=False, italic=False):
+        return pygame.font.Font(self.resolve(name, bold, italic), size)
+
+    def save(self):
+        if not self.changed:
+            return
+        try:
+            with open(self.path, 'w') as f:
+                json.dump(self.paths, f, indent=1)
+            self.changed = False
+        except IOError:
+            print(f"Warning: Could not save font cache to {self.path}.")
@@ -0,0 +1,179 @@
+# --- Leaderboard ---
+# Keeps the top scores of every difficulty, with when each game was played
+# and how long it lasted, in an SQLite database in WAL mode: a crash in the
+# middle of a write leaves the previous state intact instead of a
+# half-written file.
+#
+# The scores are read once when the Leaderboard is created and kept in
+# memory; record() updates that copy and queues the write for a background
+# thread with its own connection, so the game loop never waits on the disk.
+# close() lets the writer finish what is queued.
+#
+# A highscore.txt from older versions (a single score, no difficulty) is
+# imported on first run as a score with an unknown difficulty.
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+LEADERBOARD_FILE = "leaderboard.db"
+LEGACY_HIGH_SCORE_FILE = "highscore.txt"
+TOP_N = 10
+
+# Difficulty stored for the migrated highscore.txt score
+UNKNOWN_DIFFICULTY = ""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    difficulty TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    played_at REAL NOT NULL,     -- unix time the game ended
+    duration_s REAL              -- NULL for the migrated score
+);
+CREATE INDEX IF NOT EXISTS scores_by_difficulty ON scores (difficulty, score DESC);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class ScoreEntry(NamedTuple):
+    score: int
+    played_at: float
+    duration_s: float
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # With WAL, NORMAL still never corrupts the database; it just may lose
+    # the last commit on power loss
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class Leaderboard:
+    def __init__(self, path=LEADERBOARD_FILE, top_n=TOP_N, legacy_path=LEGACY_HIGH_SCORE_FILE):
+        # path None keeps scores in memory only (nothing is read or written)
+        self.path = path
+        self.top_n = top_n
+        self.scores = {}   # difficulty -> ScoreEntry list, best first
+        self.queue = None
+        self.writer = None
+        # Stats
+        self.writes = 0
+        self.write_errors = 0
+
+        if path is None:
+            return
+        try:
+            conn = connect(path)
+            try:
+                self._migrate_legacy(conn, legacy_path)
+                self._load(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Warning: Could not open leaderboard {path} ({e}). Scores won't be saved.")
+            return
+
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, name="leaderboard-writer", daemon=True)
+        self.writer.start()
+
+    def _migrate_legacy(self, conn, legacy_path):
+        if legacy_path is None or not os.path.exists(legacy_path):
+            return
+        with conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_migrated'").fetchone():
+                return
+            try:
+                with open(legacy_path) as f:
+                    score = int(f.read())
+                played_at = os.path.getmtime(legacy_path)
+            except (IOError, ValueError):
+                print(f"Warning: Could not read or parse {legacy_path}; not importing it.")
+                score = 0
+            if score > 0:
+                conn.execute("INSERT INTO scores (difficulty, score, played_at, duration_s) VALUES (?, ?, ?, NULL)",
+                             (UNKNOWN_DIFFICULTY, score, played_at))
+            conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_migrated', ?)", (str(time.time()),))
+
+    def _load(self, conn):
+        rows = conn.execute("SELECT difficulty, score, played_at, duration_s FROM scores "
+                            "ORDER BY difficulty, score DESC, played_at").fetchall()
+        for difficulty, score, played_at, duration_s in rows:
+            entries = self.scores.setdefault(difficulty, [])
+            if len(entries) < self.top_n:
+                entries.append(ScoreEntry(score, played_at, duration_s))
+
+    # --- Reading (in-memory copy) ---
+    def top(self, difficulty):
+        return list(self.scores.get(difficulty, []))
+
+    def best(self, difficulty=None):
+        # Best score of one difficulty, or of all of them (including the
+        # migrated one) when difficulty is None
+        if difficulty is None:
+            return max((entries[0].score for entries in self.scores.values() if entries), default=0)
+        entries = self.scores.get(difficulty)
+        return entries[0].score if entries else 0
+
+    # --- Recording ---
+    def record(self, difficulty, score, duration_s, played_at=None):
+        # Returns the entry's rank (0 = best) or None if it didn't make the top N
+        entry = ScoreEntry(score, time.time() if played_at is None else played_at, duration_s)
+        entries = self.scores.setdefault(difficulty, [])
+        rank = 0
+        while rank < len(entries) and entries[rank].score >= score:
+            rank += 1
+        if rank >= self.top_n:
+            return None
+        entries.insert(rank, entry)
+        del entries[self.top_n:]
+        if self.queue is not None:
+            self.queue.put((difficulty, entry))
+        return rank
+
+    def _write_loop(self):
+        try:
+            conn = connect(self.path)
+        except sqlite3.Error as e:
+            print(f"Warning: Could not open leaderboard {self.path} ({e}). Scores won't be saved.")
+            conn = None
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if conn is None:
+                continue
+            difficulty, entry = item
+            try:
+                with conn:
+                    conn.execute("INSERT INTO scores (difficulty, score, played_at, duration_s) VALUES (?, ?, ?, ?)",
+                                 (difficulty, entry.score, entry.played_at, entry.duration_s))
+                    # Only the top N of each difficulty are kept
+                    conn.execute("DELETE FROM scores WHERE difficulty = ? AND id NOT IN "
+                                 "(SELECT id FROM scores WHERE difficulty = ? "
+                                 "ORDER BY score DESC, played_at LIMIT ?)",
+                                 (difficulty, difficulty, self.top_n))
+                self.writes += 1
+            except sqlite3.Error as e:
+                self.write_errors += 1
+                print(f"Warning: Could not save score to {self.path} ({e}).")
+        if conn is not None:
+            conn.close()
+
+    def close(self, timeout=2.0):
+        # Waits (up to timeout seconds) for queued writes to reach the disk
+        if self.writer is None:
+            return
+        self.queue.put(None)
+        self.writer.join(timeout)
+        self.writer = None
@@ -0,0 +1,67 @@
+# --- Scripted players ---
+# Policies for driving a headless Simulation: called as policy(sim) once per
+# frame, they return the FrameInput for that frame (see Simulation.run).
+
+import random
+
+from settings import shooter_width
+from simulation import FrameInput, NO_INPUT
+
+# Mixed into the game seed for the policy's own RNG. Seeding both with the
+# same number would replay the Simulation's random stream, tying the bot's
+# key presses to the balloon spawns.
+POLICY_SEED_SALT = 0x5EED
+
+
+def idle_policy(sim):
+    # Never moves or shoots; every balloon is a miss
+    return NO_INPUT
+
+
+class RandomPolicy:
+    # Mashes keys at random (no pausing or speed changes)
+    def __init__(self, seed=None, move_chance=0.3, fire_chance=0.1):
+        self.rng = random.Random(seed)
+        self.move_chance = move_chance
+        self.fire_chance = fire_chance
+
+    def __call__(self, sim):
+        rng = self.rng
+        return FrameInput(left=rng.random() < self.move_chance,
+                          right=rng.random() < self.move_chance,
+                          fire=rng.random() < self.fire_chance)
+
+
+class AimPolicy:
+    # Chases the lowest balloon and shoots once it is lined up, at most once
+    # every fire_cooldown frames
+    def __init__(self, fire_cooldown=8, tolerance=6):
+        self.fire_cooldown = fire_cooldown
+        self.tolerance = tolerance
+        self.last_shot = -fire_cooldown
+
+    def __call__(self, sim):
+        balloons = sim.balloons
+        if not balloons:
+            return NO_INPUT
+        target = max(balloons, key=lambda balloon: balloon.y)
+        offset = target.x - (sim.shooter_x + shooter_width // 2)
+        fire = abs(offset) <= self.tolerance and sim.frame - self.last_shot >= self.fire_cooldown
+        if fire:
+            self.last_shot = sim.frame
+        return FrameInput(left=offset < -self.tolerance, right=offset > self.tolerance, fire=fire)
+
+
+POLICIES = {
+    'idle': lambda seed: idle_policy,
+    'random': lambda seed: RandomPolicy(None if seed is None else seed ^ POLICY_SEED_SALT),
+    'aim': lambda seed: AimPolicy(),
+}
+
+
+def make_policy(name, seed=None):
+    # seed: the game's seed; a random policy derives its own stream from it
+    try:
+        return POLICIES[name](seed)
+    except KeyError:
+        raise ValueError(f"Unknown policy: {name!r} (choose from {', '.join(POLICIES)})") from None
@@ -0,0 +1,172 @@
+# --- Per-phase frame profiler ---
+# Times each phase of the main loop with perf_counter_ns and keeps the last
+# `capacity` frames in fixed-size ring buffers (one array per phase, plus the
+# frame start time and entity counts), so recording never allocates:
+#
+#     profiler.begin_frame()
+#     ...handle events...      profiler.mark("events")
+#     ...step the simulation... profiler.mark("logic")
+#     ...
+#     profiler.end_frame(balloon_count, bullet_count)
+#
+# mark(phase) charges the time since the previous mark to that phase (a
+# phase marked twice in a frame adds up). The front end only creates a
+# profiler when asked to (--profile), so with it off the loop pays for a
+# few `if profiler:` checks and nothing else.
+#
+# dump(path) writes the buffered frames as a Chrome trace (.json, open it
+# in chrome://tracing or Perfetto) or as CSV (any other extension).
+
+import csv
+import json
+import os
+from array import array
+from time import perf_counter_ns
+
+# Main loop phases, in the order they run
+PHASES = ("idle", "events", "logic", "draw", "flip", "tick")
+
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile of an already sorted sequence
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    def __init__(self, capacity=3600, phases=PHASES):
+        self.capacity = capacity
+        self.phases = phases
+        self.durations = {phase: array('q', bytes(8 * capacity)) for phase in phases}
+        self.starts = array('q', bytes(8 * capacity))
+        self.balloons = array('l', bytes(array('l').itemsize * capacity))
+        self.bullets = array('l', bytes(array('l').itemsize * capacity))
+        self.frames = 0          # frames recorded so far (the ring keeps the last `capacity`)
+        self.slot = 0
+        self.last = 0
+        self.overlay = True      # whether the front end should draw the overlay
+
+    # --- Recording ---
+    def begin_frame(self):
+        slot = self.slot = self.frames % self.capacity
+        for durations in self.durations.values():
+            durations[slot] = 0
+        self.starts[slot] = self.last = perf_counter_ns()
+
+    def mark(self, phase):
+        now = perf_counter_ns()
+        self.durations[phase][self.slot] += now - self.last
+        self.last = now
+
+    def end_frame(self, balloon_count, bullet_count):
+        self.balloons[self.slot] = balloon_count
+        self.bullets[self.slot] = bullet_count
+        self.frames += 1
+
+    # --- Reading ---
+    def recent_slots(self, window=None):
+        # Ring slots of the last `window` recorded frames, oldest first
+        count = min(self.frames, self.capacity)
+        if window is not None:
+            count = min(count, window)
+        first = self.frames - count
+        return [i % self.capacity for i in range(first, self.frames)]
+
+    def stats(self, window=None):
+        # {phase: (p50, p95, p99)} in milliseconds over the last `window`
+        # frames, with the whole frame as "frame"
+        slots = self.recent_slots(window)
+        totals = [0] * len(slots)
+        result = {}
+        for phase in self.phases:
+            durations = self.durations[phase]
+            values = [durations[slot] for slot in slots]
+            for i, value in enumerate(values):
+                totals[i] += value
+            result[phase] = self._percentiles(values)
+        result["frame"] = self._percentiles(totals)
+        return result
+
+    def _percentiles(self, values):
+        values.sort()
+        return tuple(percentile(values, fraction) / 1e6 for fraction in (0.5, 0.95, 0.99))
+
+    def entity_counts(self):
+        # (balloons, bullets) in the last recorded frame
+        if not self.frames:
+            return 0, 0
+        slot = (self.frames - 1) % self.capacity
+        return self.balloons[slot], self.bullets[slot]
+
+    # --- Export ---
+    def dump(self, path):
+        if os.path.splitext(path)[1].lower() == ".json":
+            self.dump_chrome_trace(path)
+        else:
+            self.dump_csv(path)
+
+    def dump_csv(self, path):
+        # One row per frame, phase times in microseconds
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "start_us", *(f"{phase}_us" for phase in self.phases),
+                             "balloons", "bullets"])
+            first = self.frames - min(self.frames, self.capacity)
+            for frame, slot in enumerate(self.recent_slots(), first):
+                writer.writerow([frame, self.starts[slot] // 1000,
+                                 *(self.durations[phase][slot] / 1000 for phase in self.phases),
+                                 self.balloons[slot], self.bullets[slot]])
+
+    def dump_chrome_trace(self, path):
+        # Phases are laid out back to back from the frame start, in PHASES
+        # order; entity counts become a counter track
+        events = []
+        slots = self.recent_slots()
+        origin = self.starts[slots[0]] if slots else 0
+        for slot in slots:
+            ts = (self.starts[slot] - origin) / 1000
+            frame_start = ts
+            for phase in self.phases:
+                duration = self.durations[phase][slot] / 1000
+                if duration:
+                    events.append({"name": phase, "ph": "X", "ts": ts, "dur": duration,
+                                   "pid": 1, "tid": 1})
+                    ts += duration
+            events.append({"name": "frame", "ph": "X", "ts": frame_start, "dur": ts - frame_start,
+                           "pid": 1, "tid": 0})
+            events.append({"name": "entities", "ph": "C", "ts": frame_start, "pid": 1,
+                           "args": {"balloons": self.balloons[slot], "bullets": self.bullets[slot]}})
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+# --- Startup timing ---
+class StartupTimer:
+    # Named checkpoints from process start-up to the first frame (and after,
+    # for work finished in the background), reported as the time each step took
+    def __init__(self, start_ns=None):
+        self.start = self.last = perf_counter_ns() if start_ns is None else start_ns
+        self.steps = []   # (name, duration ns, ns since start)
+
+    def mark(self, name):
+        now = perf_counter_ns()
+        self.steps.append((name, now - self.last, now - self.start))
+        self.last = now
+
+    def mark_since(self, name, start_ns):
+        # For steps that didn't run in sequence with the others (e.g. on
+        # another thread); doesn't move the sequential checkpoint
+        now = perf_counter_ns()
+        self.steps.append((name, now - start_ns, now - self.start))
+
+    def format_step(self, step):
+        name, duration, elapsed = step
+        return f"{name:<28}{duration / 1e6:>8.1f}{elapsed / 1e6:>9.1f}"
+
+    def report(self):
+        lines = [f"{'startup step':<28}{'ms':>8}{'at ms':>9}"]
+        lines.extend(self.format_step(step) for step in self.steps)
+        return "\n".join(lines)
+
@@ -0,0 +1,202 @@
+# --- Replay recording and playback ---
+# A seeded Simulation is fully determined by its seed, the input of every
+# step and the few menu actions taken with the mouse (choosing a difficulty,
+# resuming, starting a new game). A replay file stores exactly that, so a
+# session can be re-simulated frame for frame without a window, as fast as
+# the CPU allows:
+#
+#     python replay.py session.bsr
+#
+# File format (little endian):
+#   header   "BSRP", version (u8), seed (u64)
+#   records  input run:  one byte 0b00mmmmmm (the 6 input bits) followed by
+#                        the number of consecutive steps with that input as
+#                        an unsigned LEB128 varint
+#            command:    one byte 0x80 | command, one byte argument
+#            end:        0xFF
+# Inputs rarely change from one frame to the next, so run-length encoding
+# keeps a long session down to a few bytes per second of play.
+
+import struct
+import sys
+import time
+
+from settings import DIFFICULTY_LEVELS
+from simulation import Simulation, FrameInput
+
+MAGIC = b"BSRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBQ")
+MAX_SEED = 2**64 - 1   # the header stores the seed as a u64
+
+# Input bits, in FrameInput field order
+INPUT_BITS = {name: 1 << i for i, name in enumerate(FrameInput._fields)}
+
+# Commands (menu actions that don't go through step)
+CMD_START_GAME = 1    # argument: index into DIFFICULTY_LEVELS
+CMD_CHANGE_STATE = 2  # argument: index into STATES
+COMMAND_FLAG = 0x80
+COMMAND_RECORDS = {CMD_START_GAME: "start_game", CMD_CHANGE_STATE: "change_state"}
+END = 0xFF
+
+DIFFICULTY_NAMES = list(DIFFICULTY_LEVELS)
+STATES = ["start", "playing", "paused", "game_over"]
+
+
+class ReplayError(Exception):
+    pass
+
+
+def encode_input(inputs):
+    mask = 0
+    for bit, pressed in zip(INPUT_BITS.values(), inputs):
+        if pressed:
+            mask |= bit
+    return mask
+
+
+def decode_input(mask):
+    return FrameInput(*(bool(mask & bit) for bit in INPUT_BITS.values()))
+
+
+def write_varint(out, value):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("Truncated replay file")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+# --- Recording ---
+class ReplayRecorder:
+    def __init__(self, path, seed):
+        self.path = path
+        self.seed = seed
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, seed))
+        self.run_mask = None
+        self.run_length = 0
+        self.frames = 0
+
+    def _flush_run(self):
+        if self.run_length:
+            self.data.append(self.run_mask)
+            write_varint(self.data, self.run_length)
+        self.run_mask = None
+        self.run_length = 0
+
+    def record_input(self, inputs):
+        # Call once per Simulation.step, with the inputs passed to it
+        mask = encode_input(inputs)
+        if mask != self.run_mask:
+            self._flush_run()
+            self.run_mask = mask
+        self.run_length += 1
+        self.frames += 1
+
+    def record_start_game(self, difficulty_name):
+        self._record_command(CMD_START_GAME, DIFFICULTY_NAMES.index(difficulty_name))
+
+    def record_change_state(self, new_state):
+        self._record_command(CMD_CHANGE_STATE, STATES.index(new_state))
+
+    def _record_command(self, command, argument):
+        self._flush_run()
+        self.data += bytes((COMMAND_FLAG | command, argument))
+
+    def close(self):
+        # Writes the whole file at once; a replay is tiny
+        self._flush_run()
+        self.data.append(END)
+        with open(self.path, 'wb') as f:
+            f.write(self.data)
+
+
+# --- Playback ---
+def load_replay(path):
+    # Returns (seed, records) where records are ("input", FrameInput, count)
+    # or ("start_game", difficulty) / ("change_state", state)
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ReplayError("Not a replay file")
+    magic, version, seed = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ReplayError("Not a replay file")
+    if version != VERSION:
+        raise ReplayError(f"Unsupported replay version {version}")
+
+    records = []
+    pos = HEADER.size
+    while True:
+        if pos >= len(data):
+            raise ReplayError("Truncated replay file")
+        byte = data[pos]
+        pos += 1
+        if byte == END:
+            return seed, records
+        if byte & COMMAND_FLAG:
+            if pos >= len(data):
+                raise ReplayError("Truncated replay file")
+            command, argument = byte & ~COMMAND_FLAG, data[pos]
+            pos += 1
+            if command == CMD_START_GAME:
+                names = DIFFICULTY_NAMES
+            elif command == CMD_CHANGE_STATE:
+                names = STATES
+            else:
+                raise ReplayError(f"Unknown replay command {command}")
+            if argument >= len(names):
+                raise ReplayError(f"Bad command argument {argument} for replay command {command}")
+            records.append((COMMAND_RECORDS[command], names[argument]))
+        else:
+            count, pos = read_varint(data, pos)
+            records.append(("input", decode_input(byte), count))
+
+
+def play_replay(path, backend="list", on_step=None):
+    # Re-simulate a recorded session without rendering. on_step(sim, result)
+    # is called after every step if given. Returns the Simulation.
+    seed, records = load_replay(path)
+    sim = Simulation(backend=backend, seed=seed)
+    step = sim.step
+    for record in records:
+        kind = record[0]
+        if kind == "input":
+            _, inputs, count = record
+            for _ in range(count):
+                result = step(inputs)
+                if on_step:
+                    on_step(sim, result)
+        elif kind == "start_game":
+            sim.start_game(record[1])
+        else:
+            sim.change_state(record[1])
+    return sim
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python replay.py REPLAY_FILE")
+        sys.exit(1)
+    start = time.perf_counter()
+    sim = play_replay(sys.argv[1])
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {sim.frame} frames in {elapsed:.3f}s: score={sim.score} lives={sim.lives} "
+          f"state={sim.game_state} difficulty={sim.selected_difficulty}")
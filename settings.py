@@ -0,0 +1,71 @@
+# --- Shared game settings ---
+# Plain constants only: importing this module must never touch pygame's
+# display or mixer, so both the windowed game and the headless simulation
+# can use it.
+
+# Screen dimensions
+WIDTH, HEIGHT = 600, 800
+
+# --- Colors ---
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+BLUE = (0, 0, 255)
+GRAY = (200, 200, 200)
+LIGHT_GRAY = (220, 220, 220)
+RED = (255, 0, 0)
+GREEN = (0, 150, 0)
+YELLOW = (255, 220, 0) # For Medium button maybe
+ORANGE = (255, 140, 0) # For Hard button maybe
+
+# Attractive colors for balloons
+attractive_colors = [
+    (255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 165, 0),
+    (128, 0, 128), (255, 255, 0), (0, 255, 255),
+]
+
+# System font for all text; None uses pygame's bundled font, which needs
+# no system font lookup at startup
+FONT_NAME = None
+
+# --- Game Settings ---
+FPS = 60 # Game logic tick rate (the render rate is set separately)
+MAX_CATCH_UP_TICKS = 5 # Most ticks run per drawn frame before the game slows down instead
+INITIAL_SHOOTER_SPEED = 7 # Can still be adjusted by player
+BULLET_SPEED = 10
+INITIAL_LIVES = 5
+
+# Balloon and bullet objects created up front by the entity pools (they
+# grow past this when needed and keep everything for reuse)
+BALLOON_POOL_CAPACITY = 64
+BULLET_POOL_CAPACITY = 64
+
+# Mixer channels reserved for each sound effect, and their base volume
+# (leaves headroom for pops merged into one louder play)
+SOUND_VOICES = {'shoot': 4, 'pop': 4}
+SOUND_VOLUME = 0.7
+
+# --- Difficulty Levels ---
+DIFFICULTY_LEVELS = {
+    "Easy":   {'spawn_delay': 1800, 'min_speed': 1.5, 'max_speed': 3.0, 'score_multiplier': 1.0, 'color': GREEN},
+    "Medium": {'spawn_delay': 1300, 'min_speed': 2.0, 'max_speed': 4.5, 'score_multiplier': 1.5, 'color': YELLOW},
+    "Hard":   {'spawn_delay': 800,  'min_speed': 3.0, 'max_speed': 6.0, 'score_multiplier': 2.0, 'color': ORANGE}
+}
+
+# --- Balloon Properties ---
+BALLOON_TYPES = {
+    'small':  {'radius': 15, 'base_score': 3},
+    'medium': {'radius': 20, 'base_score': 2},
+    'large':  {'radius': 27, 'base_score': 1},
+}
+BALLOON_PROBABILITY = {'small': 0.3, 'medium': 0.5, 'large': 0.2}
+balloon_type_keys = list(BALLOON_TYPES.keys())
+balloon_probabilities = [BALLOON_PROBABILITY[key] for key in balloon_type_keys]
+
+# --- Shooter properties ---
+shooter_width = 50
+shooter_height = 20
+shooter_y = HEIGHT - shooter_height - 10
+
+# --- Bullet properties ---
+bullet_width = 5
+bullet_height = 10
@@ -0,0 +1,526 @@
+# --- Headless game simulation ---
+# All gameplay state and rules live here, with no display, mixer or wall
+# clock involved. The windowed game (ballon_game.py) drives a Simulation one
+# frame at a time; soak tests and balance runs can drive it as fast as the
+# CPU allows:
+#
+#     sim = Simulation()
+#     sim.start_game("Hard")
+#     sim.run(60 * 60 * 10, policy=lambda sim: FrameInput(fire=True))
+
+import math
+import random
+from array import array
+from itertools import chain
+from typing import NamedTuple
+
+import pygame
+
+from settings import (
+    WIDTH, HEIGHT, FPS, INITIAL_SHOOTER_SPEED, BULLET_SPEED, INITIAL_LIVES,
+    DIFFICULTY_LEVELS, BALLOON_TYPES, balloon_type_keys, balloon_probabilities,
+    attractive_colors, shooter_width, shooter_y,
+    bullet_width, bullet_height, BALLOON_POOL_CAPACITY, BULLET_POOL_CAPACITY,
+)
+from spatial_hash import SpatialHash
+from entity_pool import Balloon, Pool
+
+# Balloon types are told apart by radius (all that a popped Balloon keeps)
+balloon_type_by_radius = {info['radius']: key for key, info in BALLOON_TYPES.items()}
+
+# Length of one simulated frame in milliseconds (what clock.tick(FPS) aims for)
+FRAME_MS = 1000 / FPS
+
+
+class FrameInput(NamedTuple):
+    # Held keys
+    left: bool = False
+    right: bool = False
+    # Key presses (KEYDOWN) seen during this frame
+    fire: bool = False
+    speed_up: bool = False
+    speed_down: bool = False
+    pause: bool = False
+
+
+NO_INPUT = FrameInput()
+
+
+class StepResult:
+    # What happened during one step, so the front end can play sounds etc.
+    def __init__(self):
+        self.fired = False
+        self.spawned = 0   # balloons spawned this frame
+        self.popped = []   # balloons popped this frame (pooled: only valid until the next step)
+        self.missed = 0    # balloons that fell off the bottom
+
+
+class ListEntityStore:
+    # The original representation: Balloon records and bullet pygame.Rects
+    # in plain lists, updated one entity at a time. Both come from free-list
+    # pools (entity_pool.py), so popped, missed and culled entities are
+    # recycled by later spawns and shots. With broad_phase on, bullets
+    # are also kept in a SpatialHash so each balloon only tests nearby ones,
+    # and a bullet that moves more than its own height per frame is tested
+    # at intermediate points along its path so it can't tunnel through a
+    # balloon. At the default speeds that is a single point, so results are
+    # identical to the brute-force loop.
+    #
+    # Every bullet moves up by BULLET_SPEED each frame, so the hash stores
+    # them in "scrolled" coordinates (world y + bullet_scroll, where
+    # bullet_scroll grows by BULLET_SPEED per frame). A bullet's entry then
+    # never changes: the hash is only touched when a bullet is fired, popped
+    # or leaves the screen, and queries are shifted by the same offset.
+    def __init__(self, broad_phase=True, balloon_capacity=BALLOON_POOL_CAPACITY,
+                 bullet_capacity=BULLET_POOL_CAPACITY):
+        self.bullets = []
+        self.balloons = []
+        self.balloon_pool = Pool(Balloon, balloon_capacity)
+        self.bullet_pool = Pool(lambda: pygame.Rect(0, 0, bullet_width, bullet_height), bullet_capacity)
+        # Reused for every balloon's bounding box during update
+        self.balloon_rect = pygame.Rect(0, 0, 0, 0)
+        self.grid = SpatialHash() if broad_phase else None
+        self.bullet_keys = {}   # id(bullet rect) -> key in grid (spawn order)
+        self.next_bullet_key = 0
+        self.bullet_scroll = 0
+        self.substeps = max(1, math.ceil(BULLET_SPEED / bullet_height))
+
+    def clear(self):
+        self.bullet_pool.release_all(self.bullets)
+        self.balloon_pool.release_all(self.balloons)
+        self.bullets = []
+        self.balloons = []
+        if self.grid is not None:
+            self.grid.clear()
+            self.bullet_keys.clear()
+            self.bullet_scroll = 0
+
+    def balloon_count(self):
+        return len(self.balloons)
+
+    def bullet_count(self):
+        return len(self.bullets)
+
+    def pool_stats(self):
+        return {'balloons': self.balloon_pool.stats(), 'bullets': self.bullet_pool.stats()}
+
+    def add_balloon(self, x, y, speed, color, radius, base_score):
+        balloon = self.balloon_pool.acquire()
+        balloon.x = x
+        balloon.y = y
+        balloon.speed = speed
+        balloon.color = color
+        balloon.radius = radius
+        balloon.base_score = base_score
+        self.balloons.append(balloon)
+        return balloon
+
+    def add_bullet(self, x, y):
+        bullet_rect = self.bullet_pool.acquire()
+        bullet_rect.x = x
+        bullet_rect.y = y
+        self.bullets.append(bullet_rect)
+        if self.grid is not None:
+            key = self.next_bullet_key
+            self.next_bullet_key += 1
+            self.bullet_keys[id(bullet_rect)] = key
+            # Covers the stretch it sweeps during each frame's move (the
+            # next update moves it up BULLET_SPEED and bumps the scroll)
+            self.grid.insert(key, bullet_rect,
+                             (x, y + self.bullet_scroll, bullet_width, bullet_height + BULLET_SPEED))
+        return bullet_rect
+
+    # --- Snapshots (snapshot.py) ---
+    def export_entities(self):
+        # Returns ((x, y, speed, radius, base_score) arrays, RGB bytes,
+        # (x, y) bullet arrays), one column per field
+        balloons = self.balloons
+        bullets = self.bullets
+        return ((array('i', [balloon.x for balloon in balloons]),
+                 array('d', [balloon.y for balloon in balloons]),
+                 array('d', [balloon.speed for balloon in balloons]),
+                 array('i', [balloon.radius for balloon in balloons]),
+                 array('i', [balloon.base_score for balloon in balloons])),
+                bytes(chain.from_iterable([balloon.color for balloon in balloons])),
+                (array('i', [bullet.x for bullet in bullets]),
+                 array('i', [bullet.y for bullet in bullets])))
+
+    def import_entities(self, balloons, colors, bullets):
+        # Replaces every entity with the columns export_entities returned
+        self.clear()
+        self.balloons = self.balloon_pool.acquire_many(len(balloons[0]))
+        rgb = zip(colors[0::3], colors[1::3], colors[2::3])
+        for balloon, x, y, speed, radius, base_score, color in zip(self.balloons, *balloons, rgb):
+            balloon.x = x
+            balloon.y = y
+            balloon.speed = speed
+            balloon.color = color
+            balloon.radius = radius
+            balloon.base_score = base_score
+        xs, ys = bullets
+        self.bullets = self.bullet_pool.acquire_many(len(xs))
+        for bullet, x, y in zip(self.bullets, xs, ys):
+            bullet.x = x
+            bullet.y = y
+        if self.grid is not None:
+            # As add_bullet does for each one (the scroll is 0 after clear())
+            first_key = self.next_bullet_key
+            keys = range(first_key, first_key + len(xs))
+            self.next_bullet_key += len(xs)
+            self.bullet_keys.update(zip(map(id, self.bullets), keys))
+            sweep_height = bullet_height + BULLET_SPEED
+            self.grid.insert_many(zip(keys, self.bullets,
+                                      [(x, y, bullet_width, sweep_height) for x, y in zip(xs, ys)]))
+
+    def update(self, score_multiplier):
+        # Move, cull and collide everything.
+        # Returns (score_gained, popped balloons, number of balloons missed).
+        if self.grid is None:
+            return self._update_brute_force(score_multiplier)
+
+        bullets = self.bullets
+        balloons = self.balloons
+        grid = self.grid
+        bullet_keys = self.bullet_keys
+        bullet_pool = self.bullet_pool
+        balloon_pool = self.balloon_pool
+        balloon_rect = self.balloon_rect
+        gained = 0
+        popped = []
+        missed = 0
+
+        self.bullet_scroll += BULLET_SPEED
+        scroll = self.bullet_scroll
+        for bullet in bullets[:]:
+            bullet.y -= BULLET_SPEED
+            if bullet.y < 0:
+                bullets.remove(bullet)
+                grid.remove(bullet_keys.pop(id(bullet)))
+                bullet_pool.release(bullet)
+
+        for balloon in balloons[:]:
+            balloon.y += balloon.speed
+            radius = balloon.radius
+
+            if balloon.y > HEIGHT + radius:
+                balloons.remove(balloon)
+                balloon_pool.release(balloon)
+                missed += 1
+                continue
+
+            balloon_center_x, balloon_center_y = balloon.x, balloon.y
+            balloon_rect.update(balloon_center_x - radius, balloon_center_y - radius, radius * 2, radius * 2)
+
+            nearby = grid.query((balloon_rect.x, balloon_rect.y + scroll, balloon_rect.w, balloon_rect.h))
+            if not nearby:
+                continue
+            # Keys follow spawn order, i.e. the order of the bullets list
+            for key in sorted(nearby):
+                bullet = nearby[key]
+                if self._swept_hit(bullet, balloon_rect, balloon_center_x, balloon_center_y, radius):
+                    # Score based on balloon type and difficulty multiplier
+                    gained += int(balloon.base_score * score_multiplier)
+
+                    bullets.remove(bullet)
+                    grid.remove(bullet_keys.pop(id(bullet)))
+                    bullet_pool.release(bullet)
+                    balloons.remove(balloon)
+                    balloon_pool.release(balloon)
+                    popped.append(balloon)
+                    break
+
+        return gained, popped, missed
+
+    def _swept_hit(self, bullet, balloon_rect, balloon_center_x, balloon_center_y, radius):
+        # The original rect pre-check plus circle test, applied at the
+        # bullet's current position and (when substeps > 1) at evenly spaced
+        # points back along the path it travelled this frame
+        substeps = self.substeps
+        for step in range(substeps):
+            probe = bullet.move(0, BULLET_SPEED * step // substeps) if step else bullet
+            if balloon_rect.colliderect(probe):
+                dx = balloon_center_x - probe.centerx
+                dy = balloon_center_y - probe.centery
+                if dx*dx + dy*dy < (radius + probe.width)**2:
+                    return True
+        return False
+
+    def _update_brute_force(self, score_multiplier):
+        # Every bullet against every balloon, exactly as the game always did
+        bullets = self.bullets
+        balloons = self.balloons
+        bullet_pool = self.bullet_pool
+        balloon_pool = self.balloon_pool
+        balloon_rect = self.balloon_rect
+        gained = 0
+        popped = []
+        missed = 0
+
+        for bullet in bullets[:]:
+            bullet.y -= BULLET_SPEED
+            if bullet.y < 0:
+                bullets.remove(bullet)
+                bullet_pool.release(bullet)
+
+        for balloon in balloons[:]:
+            balloon.y += balloon.speed
+            radius = balloon.radius
+
+            if balloon.y > HEIGHT + radius:
+                balloons.remove(balloon)
+                balloon_pool.release(balloon)
+                missed += 1
+                continue
+
+            balloon_center_x, balloon_center_y = balloon.x, balloon.y
+            balloon_rect.update(balloon_center_x - radius, balloon_center_y - radius, radius * 2, radius * 2)
+
+            for bullet in bullets[:]:
+                if balloon_rect.colliderect(bullet):
+                    dx = balloon_center_x - bullet.centerx
+                    dy = balloon_center_y - bullet.centery
+                    distance_sq = dx*dx + dy*dy
+                    if distance_sq < (radius + bullet.width)**2:
+                        # Score based on balloon type and difficulty multiplier
+                        gained += int(balloon.base_score * score_multiplier)
+
+                        bullets.remove(bullet)
+                        bullet_pool.release(bullet)
+                        balloons.remove(balloon)
+                        balloon_pool.release(balloon)
+                        popped.append(balloon)
+                        break
+
+        return gained, popped, missed
+
+
+def make_entity_store(backend):
+    if backend == "list":
+        return ListEntityStore()
+    if backend == "list-brute-force":
+        return ListEntityStore(broad_phase=False)
+    if backend == "numpy":
+        # Optional dependency, only imported when asked for
+        from entity_store import ArrayEntityStore
+        return ArrayEntityStore()
+    raise ValueError(f"Unknown entity backend: {backend!r}")
+
+
+class Simulation:
+    def __init__(self, verbose=False, on_state_change=None, backend="list", seed=None,
+                 difficulty_levels=None, balloon_probability=None, telemetry=None):
+        # backend: "list" (Balloon records and Rects, the default), "list-brute-force"
+        # (same without the spatial hash) or "numpy"
+        # (struct-of-arrays, see entity_store.py) for very large entity counts.
+        # All three give the same results for the same seed and inputs
+        #
+        # seed: with a seed the simulation is deterministic -- all randomness
+        # comes from a private RNG seeded with it, and spawning is scheduled
+        # in frames (step's dt_ms is ignored), so the same inputs always
+        # replay the same session (see replay.py)
+        #
+        # difficulty_levels / balloon_probability override DIFFICULTY_LEVELS
+        # and BALLOON_PROBABILITY (used by sweep.py to try other tunings)
+        #
+        # telemetry: a Telemetry (telemetry.py) that gets spawn, pop, miss
+        # and state events
+        self.verbose = verbose
+        self.telemetry = telemetry
+        self.difficulty_levels = DIFFICULTY_LEVELS if difficulty_levels is None else difficulty_levels
+        if balloon_probability is None:
+            self.balloon_weights = balloon_probabilities
+        else:
+            self.balloon_weights = [balloon_probability[key] for key in balloon_type_keys]
+        self.seed = seed
+        self.deterministic = seed is not None
+        self.rng = random.Random(seed)
+        # Called as on_state_change(old_state, new_state) after every transition
+        self.on_state_change = on_state_change
+
+        self.game_state = "start" # "start", "playing", "paused", "game_over"
+        self.score = 0
+        self.high_score = 0
+        self.lives = INITIAL_LIVES
+        self.shooter_x = WIDTH // 2 - shooter_width // 2
+        self.shooter_speed = INITIAL_SHOOTER_SPEED
+        self.selected_difficulty = None
+        # These will be set based on selected_difficulty
+        self.balloon_spawn_delay = 0
+        self.balloon_min_speed = 0
+        self.balloon_max_speed = 0
+        self.score_multiplier = 1.0
+
+        self.store = make_entity_store(backend)
+
+        # Replaces the SPAWN_BALLOON timer: milliseconds since the last spawn
+        self.spawn_elapsed_ms = 0
+        self.frame = 0
+
+    # Entity lists (materialised on demand by the numpy store)
+    @property
+    def bullets(self):
+        return self.store.bullets
+
+    @property
+    def balloons(self):
+        return self.store.balloons
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    def reset_game(self):
+        # ONLY resets score, lives, shooter position, and object lists
+        self.log("Resetting game state (score, lives, position)...")
+        self.score = 0
+        self.lives = INITIAL_LIVES
+        self.shooter_x = WIDTH // 2 - shooter_width // 2
+        self.store.clear()
+        self.shooter_speed = INITIAL_SHOOTER_SPEED # Reset player-adjustable speed
+
+    def start_game(self, difficulty_name):
+        self.log(f"Starting game with difficulty: {difficulty_name}")
+        self.selected_difficulty = difficulty_name
+        self.change_state("playing")
+
+    def change_state(self, new_state):
+        old_state = self.game_state
+        self.log(f"Changing state from {old_state} to {new_state}")
+
+        if new_state == "playing":
+            # If starting fresh (from start or game over)
+            if old_state == "start" or old_state == "game_over":
+                if self.selected_difficulty is None:
+                    self.log("Error: No difficulty selected!")
+                    return # Don't start playing
+
+                self.reset_game()
+
+                # Apply difficulty settings
+                params = self.difficulty_levels[self.selected_difficulty]
+                self.balloon_spawn_delay = params['spawn_delay']
+                self.balloon_min_speed = params['min_speed']
+                self.balloon_max_speed = params['max_speed']
+                self.score_multiplier = params['score_multiplier']
+                self.log(f"Applied settings for {self.selected_difficulty}: delay={self.balloon_spawn_delay}, "
+                         f"speed=({self.balloon_min_speed}-{self.balloon_max_speed}), score_mult={self.score_multiplier}")
+
+            # If resuming from pause, parameters are already set, just change state.
+            # Either way the spawn timer restarts from zero, like set_timer did.
+            self.game_state = "playing"
+            self.spawn_elapsed_ms = 0
+
+        elif new_state == "paused":
+            if old_state != "playing":
+                self.log(f"Cannot pause from state: {old_state}")
+                return # Don't change state
+            self.game_state = "paused"
+
+        elif new_state == "game_over":
+            self.game_state = "game_over"
+            if self.score > self.high_score:
+                self.log(f"New high score: {self.score}")
+                self.high_score = self.score
+
+        elif new_state == "start":
+            self.game_state = "start"
+            # Reset selected difficulty for next choice
+            self.selected_difficulty = None
+
+        else:
+            self.game_state = new_state
+
+        if self.telemetry:
+            self.telemetry.emit("state", frame=self.frame, old=old_state, new=self.game_state,
+                                difficulty=self.selected_difficulty, score=self.score, lives=self.lives)
+        if self.on_state_change:
+            self.on_state_change(old_state, self.game_state)
+
+    # --- Spawning ---
+    def spawn_balloon(self):
+        rng = self.rng
+        chosen_type_key = rng.choices(balloon_type_keys, weights=self.balloon_weights, k=1)[0]
+        balloon_info = BALLOON_TYPES[chosen_type_key]
+        radius = balloon_info['radius']
+        x = rng.randint(radius, WIDTH - radius)
+        # Use speeds set by difficulty
+        speed = rng.uniform(self.balloon_min_speed, self.balloon_max_speed)
+        if self.telemetry:
+            self.telemetry.emit("spawn", frame=self.frame, type=chosen_type_key, x=x, speed=round(speed, 2))
+        return self.store.add_balloon(x, -radius, speed, rng.choice(attractive_colors),
+                                      radius, balloon_info['base_score'])
+
+    def fire(self):
+        return self.store.add_bullet(self.shooter_x + shooter_width // 2 - bullet_width // 2,
+                                     shooter_y - bullet_height)
+
+    # --- Stepping ---
+    def step(self, inputs=NO_INPUT, dt_ms=FRAME_MS):
+        # Advance one frame. dt_ms only drives balloon spawning (movement is
+        # per frame, as in the original loop); headless and deterministic
+        # runs use FRAME_MS.
+        if self.deterministic:
+            dt_ms = FRAME_MS
+        result = StepResult()
+        self.frame += 1
+
+        if self.game_state == "paused":
+            if inputs.pause:
+                self.change_state("playing")
+            return result
+        if self.game_state != "playing":
+            return result
+
+        # Key presses are handled before the logic, like the event loop did
+        if inputs.fire:
+            self.fire()
+            result.fired = True
+        if inputs.speed_up:
+            self.shooter_speed += 1
+        if inputs.speed_down:
+            self.shooter_speed = max(1, self.shooter_speed - 1)
+        if inputs.pause:
+            self.change_state("paused")
+            return result
+
+        if self.balloon_spawn_delay > 0:
+            self.spawn_elapsed_ms += dt_ms
+            while self.spawn_elapsed_ms >= self.balloon_spawn_delay:
+                self.spawn_elapsed_ms -= self.balloon_spawn_delay
+                self.spawn_balloon()
+                result.spawned += 1
+
+        self.run_game_logic(inputs, result)
+        return result
+
+    def run_game_logic(self, inputs, result):
+        if inputs.left and self.shooter_x > 0:
+            self.shooter_x -= self.shooter_speed
+        if inputs.right and self.shooter_x < WIDTH - shooter_width:
+            self.shooter_x += self.shooter_speed
+
+        gained, popped, missed = self.store.update(self.score_multiplier)
+        self.score += gained
+        result.popped = popped
+        result.missed = missed
+
+        for _ in range(missed):
+            self.lives -= 1
+            self.log(f"Balloon missed! Lives left: {self.lives}")
+        telemetry = self.telemetry
+        if telemetry:
+            for balloon in popped:
+                telemetry.emit("pop", frame=self.frame, type=balloon_type_by_radius.get(balloon.radius),
+                               score=int(balloon.base_score * self.score_multiplier), y=round(balloon.y))
+            if missed:
+                telemetry.emit("miss", frame=self.frame, count=missed, lives=self.lives)
+        if missed and self.lives < 0:
+            self.change_state("game_over")
+
+    def run(self, frames, policy=None):
+        # Step as fast as possible. policy(sim) returns the FrameInput for
+        # each frame; without one the shooter just stands still.
+        for _ in range(frames):
+            inputs = policy(self) if policy else NO_INPUT
+            self.step(inputs)
+        return self
@@ -0,0 +1,231 @@
+# --- Game state snapshots ---
+# capture(sim) packs everything a Simulation needs to carry on exactly where
+# it was (scores, lives, shooter, difficulty parameters, spawn timer, frame
+# counter, the RNG state and every balloon and bullet) into a compact
+# binary blob; restore(sim, data) puts it back. A seeded session restored
+# from a snapshot plays on frame for frame as it would have originally.
+#
+#     data = capture(sim)
+#     ...
+#     restore(sim, data)
+#
+# SnapshotRing keeps one snapshot every `interval` frames for rewinding, and
+# save_snapshot / load_snapshot store one in a file so a game can be
+# continued after a restart.
+#
+# Format (little endian):
+#   header    "BSNP", version (u8)
+#   state     STATE below, then game_state and selected_difficulty as a
+#             length byte + UTF-8 (length 255: None)
+#   rng       gauss_next present (u8), gauss_next (f64), 625 x u32
+#             (random.Random's Mersenne Twister state)
+#   balloons  columns of n_balloons: x (i32), y (f64), speed (f64),
+#             radius (i32), base_score (i32), color (3 x u8)
+#   bullets   columns of n_bullets: x (i32), y (i32)
+# Entities are stored column by column as array buffers rather than one
+# struct per entity, so packing thousands of them is a handful of C calls.
+
+import os
+import random
+import struct
+import sys
+from array import array
+from collections import deque
+
+MAGIC = b"BSNP"
+VERSION = 1
+HEADER = struct.Struct("<4sB")
+STATE = struct.Struct("<qqqqqqdddddII")
+RNG = struct.Struct("<Bd")
+RNG_WORDS = 625
+
+SNAPSHOT_INTERVAL = 60   # frames between ring snapshots (one second)
+SNAPSHOT_RING = 30       # snapshots kept, i.e. how far back a rewind can go
+SAVE_FILE = "savegame.bsn"
+
+NO_STRING = 255
+
+# Array typecodes of the entity columns, in file order
+BALLOON_COLUMNS = ('i', 'd', 'd', 'i', 'i')
+BULLET_COLUMNS = ('i', 'i')
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _pack_string(out, value):
+    if value is None:
+        out.append(NO_STRING)
+        return
+    encoded = value.encode()
+    if len(encoded) >= NO_STRING:
+        raise SnapshotError(f"String too long for a snapshot: {value!r}")
+    out.append(len(encoded))
+    out += encoded
+
+
+def _unpack_string(data, pos):
+    length = data[pos]
+    pos += 1
+    if length == NO_STRING:
+        return None, pos
+    return bytes(data[pos:pos + length]).decode(), pos + length
+
+
+def _append_array(out, typecode, column):
+    # column: an array.array or numpy array of that typecode
+    if sys.byteorder == 'big':
+        column = array(typecode, column)
+        column.byteswap()
+    out += column.tobytes()
+
+
+def _read_array(data, pos, typecode, count):
+    column = array(typecode)
+    end = pos + column.itemsize * count
+    if end > len(data):
+        raise SnapshotError("Truncated snapshot")
+    column.frombytes(data[pos:end])
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column, end
+
+
+def capture(sim):
+    balloons, colors, bullets = sim.store.export_entities()
+    n_balloons = len(balloons[0])
+    n_bullets = len(bullets[0])
+    out = bytearray(HEADER.pack(MAGIC, VERSION))
+    out += STATE.pack(sim.frame, sim.score, sim.high_score, sim.lives, sim.shooter_x, sim.shooter_speed,
+                      sim.spawn_elapsed_ms, sim.balloon_spawn_delay, sim.balloon_min_speed,
+                      sim.balloon_max_speed, sim.score_multiplier, n_balloons, n_bullets)
+    _pack_string(out, sim.game_state)
+    _pack_string(out, sim.selected_difficulty)
+
+    version, words, gauss_next = sim.rng.getstate()
+    out += RNG.pack(gauss_next is not None, gauss_next or 0.0)
+    _append_array(out, 'I', array('I', words))
+
+    for typecode, column in zip(BALLOON_COLUMNS, balloons):
+        _append_array(out, typecode, column)
+    out += colors
+    for typecode, column in zip(BULLET_COLUMNS, bullets):
+        _append_array(out, typecode, column)
+    return bytes(out)
+
+
+def restore(sim, data):
+    # Sets the state directly: on_state_change isn't called
+    data = memoryview(data)
+    if len(data) < HEADER.size + STATE.size:
+        raise SnapshotError("Truncated snapshot")
+    magic, version = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise SnapshotError("Not a snapshot")
+    if version != VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+    pos = HEADER.size
+    (frame, score, high_score, lives, shooter_x, shooter_speed, spawn_elapsed_ms, spawn_delay,
+     min_speed, max_speed, score_multiplier, n_balloons, n_bullets) = STATE.unpack_from(data, pos)
+    pos += STATE.size
+    try:
+        game_state, pos = _unpack_string(data, pos)
+        selected_difficulty, pos = _unpack_string(data, pos)
+        has_gauss, gauss_next = RNG.unpack_from(data, pos)
+    except (IndexError, struct.error):
+        raise SnapshotError("Truncated snapshot")
+    except UnicodeDecodeError:
+        raise SnapshotError("Corrupt snapshot: bad string")
+    pos += RNG.size
+    words, pos = _read_array(data, pos, 'I', RNG_WORDS)
+    rng_state = (3, tuple(words), gauss_next if has_gauss else None)
+    try:
+        # setstate rejects some corrupt states; find out before sim.rng does
+        random.Random().setstate(rng_state)
+    except (ValueError, TypeError):
+        raise SnapshotError("Corrupt snapshot: bad RNG state")
+
+    balloons = []
+    for typecode in BALLOON_COLUMNS:
+        column, pos = _read_array(data, pos, typecode, n_balloons)
+        balloons.append(column)
+    colors = bytes(data[pos:pos + 3 * n_balloons])
+    if len(colors) != 3 * n_balloons:
+        raise SnapshotError("Truncated snapshot")
+    pos += 3 * n_balloons
+    bullets = []
+    for typecode in BULLET_COLUMNS:
+        column, pos = _read_array(data, pos, typecode, n_bullets)
+        bullets.append(column)
+
+    # Everything is read before anything is changed
+    sim.frame = frame
+    sim.score = score
+    sim.high_score = high_score
+    sim.lives = lives
+    sim.shooter_x = shooter_x
+    sim.shooter_speed = shooter_speed
+    sim.spawn_elapsed_ms = spawn_elapsed_ms
+    sim.balloon_spawn_delay = spawn_delay
+    sim.balloon_min_speed = min_speed
+    sim.balloon_max_speed = max_speed
+    sim.score_multiplier = score_multiplier
+    sim.game_state = game_state
+    sim.selected_difficulty = selected_difficulty
+    sim.rng.setstate(rng_state)
+    sim.store.import_entities(balloons, colors, bullets)
+
+
+def save_snapshot(path, data):
+    # Written next to the target and renamed, so a crash never leaves half a file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class SnapshotRing:
+    def __init__(self, interval=SNAPSHOT_INTERVAL, capacity=SNAPSHOT_RING):
+        self.interval = interval
+        self.snapshots = deque(maxlen=capacity)   # (frame, data), oldest first
+        # Stats
+        self.captured = 0
+        self.rewinds = 0
+
+    def clear(self):
+        self.snapshots.clear()
+
+    def record(self, sim):
+        # Call after every step; captures every `interval` frames
+        if self.snapshots and sim.frame - self.snapshots[-1][0] < self.interval:
+            return
+        self.snapshots.append((sim.frame, capture(sim)))
+        self.captured += 1
+
+    def rewind(self, sim):
+        # Restores the newest snapshot from before sim.frame and drops it
+        # and any later ones, so each call goes further back (the game
+        # records a fresh one once it carries on). Returns False if there
+        # is nothing to go back to.
+        snapshots = self.snapshots
+        while snapshots and snapshots[-1][0] >= sim.frame:
+            snapshots.pop()
+        if not snapshots:
+            return False
+        restore(sim, snapshots.pop()[1])
+        self.rewinds += 1
+        return True
+
+    def stats(self):
+        return {
+            'snapshots': len(self.snapshots),
+            'bytes': sum(len(data) for _, data in self.snapshots),
+            'captured': self.captured,
+            'rewinds': self.rewinds,
+        }
@@ -0,0 +1,90 @@
+# --- Uniform-grid spatial hash ---
+# Broad phase for bullet/balloon collisions. Items are registered under a
+# key with an axis-aligned rect (x, y, w, h) and stored in every grid cell
+# the rect touches; query() returns everything sharing a cell with a rect.
+
+from settings import BALLOON_TYPES
+
+# A balloon's bounding box is at most this wide, so it never spans more than
+# two cells in either direction
+CELL_SIZE = 2 * max(info['radius'] for info in BALLOON_TYPES.values())
+
+
+class SpatialHash:
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}   # (col, row) -> {key: item}
+        self.spans = {}   # key -> (col0, row0, col1, row1) the item occupies
+
+    def __len__(self):
+        return len(self.spans)
+
+    def _span(self, rect):
+        # Rects are assumed non-empty
+        x, y, w, h = rect
+        size = self.cell_size
+        return (x // size, y // size, (x + w - 1) // size, (y + h - 1) // size)
+
+    def _add_to_cells(self, key, item, span):
+        cells = self.cells
+        col0, row0, col1, row1 = span
+        for col in range(col0, col1 + 1):
+            for row in range(row0, row1 + 1):
+                cell = cells.get((col, row))
+                if cell is None:
+                    cell = cells[(col, row)] = {}
+                cell[key] = item
+
+    def _remove_from_cells(self, key, span):
+        cells = self.cells
+        col0, row0, col1, row1 = span
+        for col in range(col0, col1 + 1):
+            for row in range(row0, row1 + 1):
+                cell = cells[(col, row)]
+                del cell[key]
+                if not cell:
+                    del cells[(col, row)]
+
+    def insert(self, key, item, rect):
+        span = self._span(rect)
+        self.spans[key] = span
+        self._add_to_cells(key, item, span)
+
+    def insert_many(self, entries):
+        # Same as insert() for each (key, item, rect), without the per-call
+        # overhead. Most bullets fit in a single cell.
+        cells = self.cells
+        spans = self.spans
+        size = self.cell_size
+        for key, item, (x, y, w, h) in entries:
+            span = spans[key] = (x // size, y // size, (x + w - 1) // size, (y + h - 1) // size)
+            col0, row0, col1, row1 = span
+            if col0 == col1 and row0 == row1:
+                cell = cells.get((col0, row0))
+                if cell is None:
+                    cells[(col0, row0)] = {key: item}
+                else:
+                    cell[key] = item
+            else:
+                self._add_to_cells(key, item, span)
+
+    def remove(self, key):
+        self._remove_from_cells(key, self.spans.pop(key))
+
+    def query(self, rect):
+        # {key: item} for everything sharing a cell with rect
+        col0, row0, col1, row1 = self._span(rect)
+        cells = self.cells
+        if col0 == col1 and row0 == row1:
+            return cells.get((col0, row0), {})
+        found = {}
+        for col in range(col0, col1 + 1):
+            for row in range(row0, row1 + 1):
+                cell = cells.get((col, row))
+                if cell:
+                    found.update(cell)
+        return found
+
+    def clear(self):
+        self.cells.clear()
+        self.spans.clear()
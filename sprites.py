@@ -0,0 +1,112 @@
+# --- Balloon sprite atlas ---
+# There are only len(BALLOON_TYPES) radii x len(attractive_colors) balloon
+# looks, so each one is drawn once (same circle, knot and shine as
+# draw_balloon) into a single atlas. Drawing a frame's worth of balloons is
+# then one Surface.blits() call with source areas from the atlas instead of
+# three primitive draws per balloon.
+#
+# The primitives are drawn without antialiasing, so every pixel is either
+# fully opaque or empty. A colorkeyed atlas in the display format is
+# pixel-identical to a convert_alpha() one and blits faster, because SDL
+# skips the per-pixel blend.
+#
+# Build it after pygame.display.set_mode(), so it can be converted to the
+# display format. Without a display mode (the texture renderer) it is left
+# as it is; it gets uploaded as a texture anyway.
+
+import pygame
+
+from settings import WHITE, BALLOON_TYPES, attractive_colors
+
+# Transparent color of the atlas; must not be used by any balloon
+COLORKEY = (255, 0, 255)
+
+
+def balloon_extent(radius):
+    # (width, height) of a balloon sprite including knot and one pixel of slack
+    knot_height = radius * 0.4
+    return 2 * radius + 2, int(2 * radius + knot_height) + 2
+
+
+def keyed_surface(size):
+    surface = pygame.Surface(size)
+    surface.fill(COLORKEY)
+    return surface
+
+
+def finish_surface(surface):
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert()
+    surface.set_colorkey(COLORKEY)
+    return surface
+
+
+def render_balloon(surface, color, cx, cy, radius):
+    # Same drawing as ballon_game.draw_balloon, centred at (cx, cy)
+    pygame.draw.circle(surface, color, (cx, cy), radius)
+    knot_offset = radius * 0.25
+    knot_height = radius * 0.4
+    points = [
+        (cx - knot_offset, cy + radius),
+        (cx + knot_offset, cy + radius),
+        (cx, cy + radius + knot_height)
+    ]
+    pygame.draw.polygon(surface, color, points)
+    shine_radius = int(radius * 0.2)
+    shine_offset = int(radius * 0.4)
+    pygame.draw.circle(surface, WHITE, (cx + shine_offset, cy - shine_offset), shine_radius)
+
+
+class BalloonAtlas:
+    def __init__(self, radii=None, colors=None):
+        radii = sorted({info['radius'] for info in BALLOON_TYPES.values()} if radii is None else radii)
+        colors = list(attractive_colors if colors is None else colors)
+
+        cell_w, cell_h = balloon_extent(max(radii))
+        surface = keyed_surface((cell_w * len(colors), cell_h * len(radii)))
+
+        # (radius, color) -> source area in the atlas
+        self.areas = {}
+        for row, radius in enumerate(radii):
+            w, h = balloon_extent(radius)
+            for col, color in enumerate(colors):
+                x, y = col * cell_w, row * cell_h
+                render_balloon(surface, color, x + radius, y + radius, radius)
+                self.areas[(radius, tuple(color))] = pygame.Rect(x, y, w, h)
+
+        self.surface = finish_surface(surface)
+        self.extra = {}   # sprites for looks outside the atlas, made on demand
+
+    def _extra_sprite(self, radius, color):
+        key = (radius, tuple(color))
+        sprite = self.extra.get(key)
+        if sprite is None:
+            w, h = balloon_extent(radius)
+            sprite = keyed_surface((w, h))
+            render_balloon(sprite, color, radius, radius, radius)
+            sprite = self.extra[key] = finish_surface(sprite)
+        return sprite
+
+    def blit_sequence(self, balloons, lag=0.0):
+        # (source, dest, area) tuples for Surface.blits. With lag, each
+        # balloon is placed `lag` ticks of its fall speed above its position.
+        # A fractional y is truncated to a whole row, as pygame.draw.circle
+        # does with a float centre; draw_balloon snaps to the same row, so
+        # both paths give the same pixels.
+        atlas = self.surface
+        areas = self.areas
+        sequence = []
+        append = sequence.append
+        for balloon in balloons:
+            radius = balloon.radius
+            dest = (balloon.x - radius, int(balloon.y - balloon.speed * lag) - radius)
+            area = areas.get((radius, balloon.color))
+            if area is None:
+                append((self._extra_sprite(radius, balloon.color), dest, None))
+            else:
+                append((atlas, dest, area))
+        return sequence
+
+    def draw(self, surface, balloons, doreturn=False, lag=0.0):
+        # With doreturn, returns the list of rects drawn
+        return surface.blits(self.blit_sequence(balloons, lag), doreturn=doreturn)
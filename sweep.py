@@ -0,0 +1,219 @@
+# --- Difficulty parameter sweep ---
+# Plays many headless games for each combination of difficulty parameters
+# and balloon type weights, spread over all cores with a process pool, and
+# writes the results as CSV tables:
+#
+#     python sweep.py --spawn-delay 600 800 1000 --max-speed 2 3 --games 50
+#     python sweep.py --samples 200 --spawn-delay 400 1500 --policy aim
+#
+# Grid mode tries every combination of the listed values. With --samples N
+# each option's values are treated as a (min, max) range instead and N
+# configurations are drawn at random from them.
+#
+# Every game is seeded (sweep seed, config index, game index), so a sweep
+# is reproducible no matter how the games were scheduled across workers.
+# The random policy draws from a separate stream derived from that seed
+# (policies.POLICY_SEED_SALT), so its moves are independent of the spawns.
+# Games are sent to the pool in chunks and their rows are written as they
+# come back, so a long sweep can be watched (or killed) half way through.
+#
+# Output:
+#   --games-csv    one row per game: parameters, score, survival time, misses
+#   --summary-csv  one row per configuration: score distribution, mean
+#                  survival time and miss rate over its games
+
+import argparse
+import csv
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+from multiprocessing import Pool
+
+from settings import DIFFICULTY_LEVELS, BALLOON_PROBABILITY, FPS
+from simulation import Simulation
+from policies import POLICIES, make_policy
+
+SWEEP_DIFFICULTY = "Sweep"
+
+PARAM_FIELDS = ['spawn_delay', 'min_speed', 'max_speed', 'score_multiplier',
+                'small_weight', 'medium_weight', 'large_weight']
+GAME_FIELDS = ['config', *PARAM_FIELDS, 'game', 'seed', 'score', 'frames',
+               'survival_s', 'spawned', 'popped', 'missed', 'shots', 'capped']
+SUMMARY_FIELDS = ['config', *PARAM_FIELDS, 'games', 'score_mean', 'score_p10', 'score_p50',
+                  'score_p90', 'score_max', 'survival_mean_s', 'miss_rate', 'hit_rate', 'capped']
+
+
+# --- Configurations ---
+def build_configs(args):
+    # Returns a list of parameter dicts (keys as in PARAM_FIELDS)
+    options = [args.spawn_delay, args.min_speed, args.max_speed, args.score_multiplier,
+               args.small_weight, args.medium_weight, args.large_weight]
+    if args.samples:
+        rng = random.Random(args.seed)
+        configs = []
+        for _ in range(args.samples):
+            values = []
+            for field, choices in zip(PARAM_FIELDS, options):
+                low, high = min(choices), max(choices)
+                value = rng.uniform(low, high)
+                values.append(round(value) if field == 'spawn_delay' else round(value, 3))
+            configs.append(dict(zip(PARAM_FIELDS, values)))
+    else:
+        configs = [dict(zip(PARAM_FIELDS, values)) for values in itertools.product(*options)]
+
+    # A balloon can't fall slower than its minimum speed
+    for params in configs:
+        if params['max_speed'] < params['min_speed']:
+            params['min_speed'], params['max_speed'] = params['max_speed'], params['min_speed']
+    return configs
+
+
+def game_seed(sweep_seed, config_index, game_index):
+    return hash((sweep_seed, config_index, game_index)) & 0xFFFFFFFFFFFF
+
+
+# --- Worker side ---
+def init_worker(sweep_seed):
+    # Games draw from their own seeded RNGs; this only keeps workers from
+    # sharing a global random stream if anything falls back to it
+    random.seed(hash((sweep_seed, os.getpid())))
+
+
+def run_game(task):
+    config_index, params, game_index, seed, policy_name, max_frames, backend = task
+    sim = Simulation(
+        backend=backend,
+        seed=seed,
+        difficulty_levels={SWEEP_DIFFICULTY: {
+            'spawn_delay': params['spawn_delay'],
+            'min_speed': params['min_speed'],
+            'max_speed': params['max_speed'],
+            'score_multiplier': params['score_multiplier'],
+        }},
+        balloon_probability={
+            'small': params['small_weight'],
+            'medium': params['medium_weight'],
+            'large': params['large_weight'],
+        },
+    )
+    policy = make_policy(policy_name, seed)
+    sim.start_game(SWEEP_DIFFICULTY)
+
+    step = sim.step
+    spawned = popped = missed = shots = 0
+    frames = 0
+    while sim.game_state == "playing" and frames < max_frames:
+        result = step(policy(sim))
+        frames += 1
+        spawned += result.spawned
+        popped += len(result.popped)
+        missed += result.missed
+        shots += result.fired
+
+    return {
+        'config': config_index, **params, 'game': game_index, 'seed': seed,
+        'score': sim.score, 'frames': frames, 'survival_s': round(frames / FPS, 2),
+        'spawned': spawned, 'popped': popped, 'missed': missed, 'shots': shots,
+        'capped': int(sim.game_state == "playing"),
+    }
+
+
+# --- Aggregation ---
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile of an already sorted list
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(config_index, params, rows):
+    scores = sorted(row['score'] for row in rows)
+    spawned = sum(row['spawned'] for row in rows)
+    missed = sum(row['missed'] for row in rows)
+    popped = sum(row['popped'] for row in rows)
+    shots = sum(row['shots'] for row in rows)
+    return {
+        'config': config_index, **params, 'games': len(rows),
+        'score_mean': round(statistics.fmean(scores), 1),
+        'score_p10': percentile(scores, 0.1),
+        'score_p50': percentile(scores, 0.5),
+        'score_p90': percentile(scores, 0.9),
+        'score_max': scores[-1],
+        'survival_mean_s': round(statistics.fmean(row['survival_s'] for row in rows), 2),
+        # Share of spawned balloons that got past the shooter
+        'miss_rate': round(missed / spawned, 4) if spawned else 0.0,
+        'hit_rate': round(popped / shots, 4) if shots else 0.0,
+        'capped': sum(row['capped'] for row in rows),
+    }
+
+
+# --- Driver ---
+def parse_args(argv=None):
+    defaults = DIFFICULTY_LEVELS["Medium"]
+    parser = argparse.ArgumentParser(description="Sweep difficulty parameters over simulated games.")
+    parser.add_argument('--spawn-delay', type=int, nargs='+', default=[defaults['spawn_delay']],
+                        help="ms between balloon spawns")
+    parser.add_argument('--min-speed', type=float, nargs='+', default=[defaults['min_speed']])
+    parser.add_argument('--max-speed', type=float, nargs='+', default=[defaults['max_speed']])
+    parser.add_argument('--score-multiplier', type=float, nargs='+', default=[defaults['score_multiplier']])
+    parser.add_argument('--small-weight', type=float, nargs='+', default=[BALLOON_PROBABILITY['small']])
+    parser.add_argument('--medium-weight', type=float, nargs='+', default=[BALLOON_PROBABILITY['medium']])
+    parser.add_argument('--large-weight', type=float, nargs='+', default=[BALLOON_PROBABILITY['large']])
+    parser.add_argument('--samples', type=int, default=0,
+                        help="draw N random configurations from the option ranges instead of a grid")
+    parser.add_argument('--games', type=int, default=20, help="games per configuration")
+    parser.add_argument('--max-minutes', type=float, default=30,
+                        help="stop a game after this much simulated time")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='aim')
+    parser.add_argument('--backend', default='list', help="entity backend (list, numpy, ...)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunksize', type=int, default=8, help="games sent to a worker at a time")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--games-csv', default='sweep_games.csv')
+    parser.add_argument('--summary-csv', default='sweep_summary.csv')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configs = build_configs(args)
+    max_frames = int(args.max_minutes * 60 * FPS)
+    tasks = [(config_index, params, game_index, game_seed(args.seed, config_index, game_index),
+              args.policy, max_frames, args.backend)
+             for config_index, params in enumerate(configs)
+             for game_index in range(args.games)]
+    print(f"Sweeping {len(configs)} configurations x {args.games} games "
+          f"on {args.workers} workers ({args.policy} policy)")
+
+    rows_by_config = {index: [] for index in range(len(configs))}
+    start = time.perf_counter()
+    simulated_frames = 0
+    with open(args.games_csv, 'w', newline='') as games_file, \
+            Pool(args.workers, initializer=init_worker, initargs=(args.seed,)) as pool:
+        writer = csv.DictWriter(games_file, fieldnames=GAME_FIELDS)
+        writer.writeheader()
+        for done, row in enumerate(pool.imap_unordered(run_game, tasks, chunksize=args.chunksize), 1):
+            writer.writerow(row)
+            rows_by_config[row['config']].append(row)
+            simulated_frames += row['frames']
+            if done % 100 == 0 or done == len(tasks):
+                games_file.flush()
+                print(f"\r{done}/{len(tasks)} games", end='', file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    with open(args.summary_csv, 'w', newline='') as summary_file:
+        writer = csv.DictWriter(summary_file, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        for config_index, params in enumerate(configs):
+            writer.writerow(summarize(config_index, params, rows_by_config[config_index]))
+
+    real_time_h = simulated_frames / FPS / 3600
+    print(f"Simulated {real_time_h:.1f}h of play ({simulated_frames} frames) in {elapsed:.1f}s; "
+          f"wrote {args.games_csv} and {args.summary_csv}")
+
+
+if __name__ == "__main__":
+    main()
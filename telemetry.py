@@ -0,0 +1,186 @@
+# --- Telemetry ---
+# A structured record of each session (spawns, pops, misses, state changes
+# and per-second frame stats) for balance analysis and performance
+# monitoring, written without slowing the frame down:
+#
+#   * emit() only puts the event in a fixed-size ring buffer; there is no
+#     lock and no I/O on the game thread;
+#   * a background thread wakes every flush_interval seconds, takes every
+#     event in the buffer and appends them as one batch of JSON lines to a
+#     gzip file, starting a new file every max_file_bytes (uncompressed)
+#     and deleting the oldest beyond max_files;
+#   * if the writer falls behind and the buffer is full, new events are
+#     dropped and counted instead of making the game wait.
+#
+#     telemetry = Telemetry("telemetry")
+#     telemetry.emit("pop", frame=120, type="small", score=6)
+#     telemetry.close()
+#
+# Each line is {"t": unix time, "event": kind, ...fields}. Read them back
+# with gzip.open(path, "rt") and json.loads per line.
+
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+
+TELEMETRY_DIR = "telemetry"
+TELEMETRY_BUFFER = 16384
+
+
+class Telemetry:
+    def __init__(self, directory=TELEMETRY_DIR, capacity=TELEMETRY_BUFFER, flush_interval=0.5,
+                 max_file_bytes=8 * 1024 * 1024, max_files=20):
+        self.directory = directory
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        # Ring buffer with one writer (the game) and one reader (the writer
+        # thread): head and tail count events ever added / taken, and each
+        # side only advances its own
+        self.buffer = [None] * capacity
+        self.head = 0
+        self.tail = 0
+        self.session = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.file = None
+        self.file_index = 0
+        self.file_bytes = 0
+        # Stats
+        self.emitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.files = 0
+        self.write_errors = 0
+        self.high_water = 0   # most events waiting at once
+
+        self.stopping = threading.Event()
+        self.writer = threading.Thread(target=self._write_loop, name="telemetry-writer", daemon=True)
+        self.writer.start()
+
+    def emit(self, kind, **fields):
+        head = self.head
+        waiting = head - self.tail
+        if waiting >= self.capacity:
+            self.dropped += 1
+            return
+        self.buffer[head % self.capacity] = (time.time(), kind, fields)
+        # Published only once the slot is filled
+        self.head = head + 1
+        self.emitted += 1
+        if waiting >= self.high_water:
+            self.high_water = waiting + 1
+
+    # --- Writer thread ---
+    def _write_loop(self):
+        while not self.stopping.wait(self.flush_interval):
+            self._drain()
+        self._drain()
+        self._close_file()
+
+    def _drain(self):
+        head = self.head
+        tail = self.tail
+        if head == tail:
+            return
+        buffer = self.buffer
+        capacity = self.capacity
+        lines = []
+        for i in range(tail, head):
+            index = i % capacity
+            t, kind, fields = buffer[index]
+            buffer[index] = None
+            lines.append(json.dumps({'t': round(t, 4), 'event': kind, **fields}, separators=(',', ':')))
+        # Frees the slots for the game thread
+        self.tail = head
+        data = ('\n'.join(lines) + '\n').encode()
+        try:
+            self._write(data)
+            self.written += len(lines)
+            self.batches += 1
+        except OSError as e:
+            self.write_errors += 1
+            if self.write_errors == 1:
+                print(f"Warning: Could not write telemetry to {self.directory} ({e}).")
+            self._close_file()
+
+    def _write(self, data):
+        if self.file is not None and self.file_bytes + len(data) > self.max_file_bytes:
+            self._close_file()
+        if self.file is None:
+            self._open_file()
+        self.file.write(data)
+        # Sync flush: everything up to here can be read even if the game
+        # is killed before the file is closed
+        self.file.flush()
+        self.file_bytes += len(data)
+
+    def _open_file(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.file_index += 1
+        path = os.path.join(self.directory, f"telemetry-{self.session}-{self.file_index:03d}.jsonl.gz")
+        self.file = gzip.open(path, 'wb')
+        self.file_bytes = 0
+        self.files += 1
+        # Keep only the newest max_files (names sort by time)
+        old = sorted(glob.glob(os.path.join(self.directory, "telemetry-*.jsonl.gz")))[:-self.max_files]
+        for old_path in old:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    def _close_file(self):
+        if self.file is None:
+            return
+        try:
+            self.file.close()
+        except OSError:
+            self.write_errors += 1
+        self.file = None
+
+    def close(self, timeout=2.0):
+        # Writes what is still buffered and closes the file
+        self.stopping.set()
+        self.writer.join(timeout)
+
+    def stats(self):
+        return {
+            'emitted': self.emitted,
+            'dropped': self.dropped,
+            'written': self.written,
+            'batches': self.batches,
+            'files': self.files,
+            'write_errors': self.write_errors,
+            'high_water': self.high_water,
+            'capacity': self.capacity,
+        }
+
+
+class FrameStats:
+    # Collects frame times and emits one "frames" event per interval_ms
+    def __init__(self, telemetry, interval_ms=1000):
+        self.telemetry = telemetry
+        self.interval_ms = interval_ms
+        self._reset()
+
+    def _reset(self):
+        self.frames = 0
+        self.total_ms = 0
+        self.max_ms = 0
+
+    def add(self, frame_ms, state, balloons, bullets):
+        self.frames += 1
+        self.total_ms += frame_ms
+        if frame_ms > self.max_ms:
+            self.max_ms = frame_ms
+        if self.total_ms < self.interval_ms:
+            return
+        self.telemetry.emit("frames", state=state, frames=self.frames,
+                            fps=round(self.frames * 1000 / self.total_ms, 1),
+                            mean_ms=round(self.total_ms / self.frames, 2), max_ms=self.max_ms,
+                            balloons=balloons, bullets=bullets, dropped=self.telemetry.dropped)
+        self._reset()
@@ -0,0 +1,53 @@
+import pytest
+
+import simulation
+from simulation import Simulation, FrameInput, ListEntityStore
+from settings import bullet_width, bullet_height
+
+
+def sweeping_policy(sim):
+    # Sweep left and right across the screen, firing every other frame
+    going_right = (sim.frame // 90) % 2 == 0
+    return FrameInput(left=not going_right, right=going_right, fire=sim.frame % 2 == 0)
+
+
+def test_broad_phase_matches_brute_force_over_dense_session():
+    # The spatial hash only changes which pairs get tested, so a seeded
+    # session must score exactly like the original every-pair loop
+    sims = []
+    for backend in ("list", "list-brute-force"):
+        sim = Simulation(backend=backend, seed=1234)
+        sim.start_game("Hard")
+        sim.balloon_spawn_delay = 60   # far denser than any difficulty
+        sims.append(sim)
+    fast, brute = sims
+
+    for _ in range(5000):
+        # Keep both games going however many balloons get through
+        fast.lives = brute.lives = 10**6
+        fast_result = fast.step(sweeping_policy(fast))
+        brute_result = brute.step(sweeping_policy(brute))
+        assert ([(balloon.x, balloon.radius) for balloon in fast_result.popped]
+                == [(balloon.x, balloon.radius) for balloon in brute_result.popped])
+        assert fast_result.missed == brute_result.missed
+        assert fast.score == brute.score
+
+    assert fast.score > 1000
+    assert [(b.x, b.y) for b in fast.balloons] == [(b.x, b.y) for b in brute.balloons]
+    assert [tuple(r) for r in fast.bullets] == [tuple(r) for r in brute.bullets]
+
+
+@pytest.mark.parametrize("speed", [bullet_height + 1, 3 * bullet_height, 60])
+def test_fast_bullet_cannot_tunnel_through_small_balloon(monkeypatch, speed):
+    monkeypatch.setattr(simulation, "BULLET_SPEED", speed)
+    radius = 15
+    cx, cy = 200, 300
+    # Every start just below the balloon: one move carries the bullet past
+    # it (or into it); the bullet's centre lines up with the balloon's
+    for y in range(cy + radius, cy + radius + speed):
+        store = ListEntityStore()
+        store.add_balloon(cx, cy, 0, (255, 0, 0), radius, 10)
+        store.add_bullet(cx - bullet_width // 2, y)
+        gained, popped, missed = store.update(1.0)
+        assert len(popped) == 1, f"bullet starting at y={y} passed through"
+        assert store.bullet_count() == 0
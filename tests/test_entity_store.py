@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from entity_store import ArrayEntityStore, grid_pairs, match_hits, GRID_COLS, GRID_ROWS
+from simulation import Simulation, FrameInput, ListEntityStore
+
+
+def greedy_reference(pairs):
+    # Balloons in index order each take their lowest bullet not taken yet
+    used = set()
+    won = []
+    for balloon in sorted({b for b, _ in pairs}):
+        for bullet in sorted(u for b, u in pairs if b == balloon):
+            if bullet not in used:
+                used.add(bullet)
+                won.append((balloon, bullet))
+                break
+    return won
+
+
+@pytest.mark.parametrize("n_balloons, n_bullets, n_pairs", [(5, 5, 8), (30, 10, 120), (200, 200, 600), (50, 400, 3000)])
+def test_match_hits_is_greedy_in_index_order(n_balloons, n_bullets, n_pairs):
+    rng = random.Random(n_pairs)
+    for _ in range(50):
+        pairs = {(rng.randrange(n_balloons), rng.randrange(n_bullets)) for _ in range(n_pairs)}
+        bi = np.array([b for b, _ in pairs], dtype=np.int64)
+        ui = np.array([u for _, u in pairs], dtype=np.int64)
+        won_balloons, won_bullets = match_hits(bi, ui)
+        assert sorted(zip(won_balloons.tolist(), won_bullets.tolist())) == greedy_reference(pairs)
+
+
+@pytest.mark.parametrize("direction", [1, -1])
+def test_grid_pairs_finds_every_neighbouring_pair(direction):
+    rng = np.random.default_rng(7)
+    cells = GRID_ROWS * GRID_COLS
+    query_keys = rng.integers(0, cells, 300)
+    bucket_keys = rng.integers(0, cells, 500)
+    qi, bi = grid_pairs(query_keys, bucket_keys, direction)
+
+    expected = set()
+    for q, key in enumerate(query_keys.tolist()):
+        for b, other in enumerate(bucket_keys.tolist()):
+            if other - key in (0, direction, direction * GRID_COLS, direction * (GRID_COLS + 1)):
+                expected.add((q, b))
+    found = list(zip(qi.tolist(), bi.tolist()))
+    assert len(found) == len(set(found))
+    assert set(found) == expected
+
+
+def test_ties_resolve_in_spawn_order_after_compaction():
+    # Two balloons over one bullet: the earlier spawned one takes it, even
+    # once swap_remove has moved the later one into a lower row
+    stores = [ListEntityStore(), ArrayEntityStore()]
+    for store in stores:
+        store.add_balloon(100, 50, 1000, (1, 1, 1), 10, 1)   # leaves the screen first update
+        store.add_balloon(300, 300, 0, (2, 2, 2), 20, 2)
+        store.add_balloon(310, 300, 0, (3, 3, 3), 20, 3)
+        store.add_bullet(200, 700)
+        store.update(1.0)
+        store.add_bullet(302, 310)
+    results = [store.update(1.0) for store in stores]
+    assert [(b.x, b.base_score) for b in results[0][1]] == [(300, 2)]
+    assert [(b.x, b.base_score) for b in results[1][1]] == [(300, 2)]
+    assert [(b.x, b.y) for b in stores[0].balloons] == [(b.x, b.y) for b in stores[1].balloons]
+
+
+def sweeping_policy(sim):
+    # Sweep left and right across the screen, firing every other frame
+    going_right = (sim.frame // 90) % 2 == 0
+    return FrameInput(left=not going_right, right=going_right, fire=sim.frame % 2 == 0)
+
+
+def test_numpy_store_matches_list_store_over_dense_session():
+    # Dense enough that balloons often share a bullet and rows get
+    # reordered by compaction every frame
+    sims = []
+    for backend in ("list", "numpy"):
+        sim = Simulation(backend=backend, seed=4321)
+        sim.start_game("Hard")
+        sim.balloon_spawn_delay = 60
+        sims.append(sim)
+    lists, arrays = sims
+
+    for _ in range(5000):
+        lists.lives = arrays.lives = 10**6
+        list_result = lists.step(sweeping_policy(lists))
+        array_result = arrays.step(sweeping_policy(arrays))
+        assert ([(balloon.x, balloon.y, balloon.radius) for balloon in list_result.popped]
+                == [(balloon.x, balloon.y, balloon.radius) for balloon in array_result.popped])
+        assert list_result.missed == array_result.missed
+        assert lists.score == arrays.score
+
+    assert lists.score > 1000
+    assert [(b.x, b.y) for b in lists.balloons] == [(b.x, b.y) for b in arrays.balloons]
+    assert [tuple(r) for r in lists.bullets] == [tuple(r) for r in arrays.bullets]
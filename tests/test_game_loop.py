@@ -0,0 +1,73 @@
+import pygame
+import pytest
+
+import ballon_game as game
+
+
+class FakeClock:
+    # pygame.time.Clock on a timeline the test moves: tick(fps) waits out
+    # the rest of the frame, and times are whole milliseconds, like the real one
+    def __init__(self):
+        self.now = 0
+        self.last = 0
+
+    def tick(self, fps=0):
+        if fps:
+            self.now = max(self.now, self.last + round(1000 / fps))
+        elapsed = self.now - self.last
+        self.last = self.now
+        return elapsed
+
+
+def test_entering_play_runs_one_tick_not_a_catch_up_burst(tmp_path, monkeypatch):
+    # Long waits on the start and pause screens used to be counted as one
+    # frame, so the first playing frame ran MAX_CATCH_UP_TICKS ticks
+    monkeypatch.chdir(tmp_path)   # leaderboard, font cache and save file
+    clock = FakeClock()
+    monkeypatch.setattr(pygame.time, "Clock", lambda: clock)
+    for name in ("running", "telemetry", "frame_stats", "snapshots", "recorder", "profiler", "accumulator_ms"):
+        monkeypatch.setattr(game, name, getattr(game, name))
+
+    def click(button):
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=button.rect.center)
+
+    def key(k):
+        return pygame.event.Event(pygame.KEYDOWN, key=k, mod=0, unicode="")
+
+    # One entry per frame: (idle time before the events arrive, events)
+    script = [
+        (3000, lambda: [click(game.easy_button)]),  # start screen
+        (0, lambda: []),
+        (0, lambda: []),
+        (0, lambda: [key(pygame.K_p)]),              # pause
+        (5000, lambda: [key(pygame.K_p)]),           # pause screen, resume
+        (0, lambda: []),
+        (0, lambda: []),
+        (0, lambda: [pygame.event.Event(pygame.QUIT)]),
+    ]
+    ticks = []
+    states = []
+
+    def next_events(*args):
+        idle, events = script[len(ticks)]
+        clock.now += idle
+        ticks.append(0)
+        states.append(game.sim.game_state)
+        return events()
+
+    run_tick = game.run_tick
+
+    def counting_run_tick(inputs):
+        ticks[-1] += 1
+        run_tick(inputs)
+
+    monkeypatch.setattr(game, "wait_for_events", next_events)
+    monkeypatch.setattr(pygame.event, "get", next_events)
+    monkeypatch.setattr(game, "run_tick", counting_run_tick)
+
+    with pytest.raises(SystemExit):
+        game.main(["--no-telemetry"])
+
+    assert states == ["start", "playing", "playing", "playing", "paused", "playing", "playing", "playing"]
+    # Frame 0 starts the game, frame 4 runs the tick that resumes it
+    assert ticks == [0, 1, 1, 1, 1, 1, 1, 1]
@@ -0,0 +1,12 @@
+import random
+
+from policies import make_policy
+
+
+def test_random_policy_does_not_share_the_game_seed_stream():
+    seed = 1234
+    policy = make_policy('random', seed)
+    game_rng = random.Random(seed)
+    assert [policy.rng.random() for _ in range(10)] != [game_rng.random() for _ in range(10)]
+    # Still reproducible from the game seed
+    assert make_policy('random', seed).rng.random() == make_policy('random', seed).rng.random()
@@ -0,0 +1,157 @@
+import pytest
+
+import replay
+from replay import (ReplayRecorder, ReplayError, load_replay, play_replay, write_varint, read_varint,
+                    encode_input, decode_input, HEADER, MAGIC, VERSION)
+from settings import DIFFICULTY_LEVELS
+from simulation import Simulation, FrameInput
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 16383, 16384, 2**35 + 7])
+def test_varint_round_trip(value):
+    out = bytearray(b"x")
+    write_varint(out, value)
+    assert read_varint(out, 1) == (value, len(out))
+
+
+def test_truncated_varint():
+    out = bytearray()
+    write_varint(out, 2**20)
+    with pytest.raises(ReplayError):
+        read_varint(out[:-1], 0)
+
+
+def test_every_input_mask_round_trips():
+    for mask in range(64):
+        assert encode_input(decode_input(mask)) == mask
+
+
+def record_sample(path, seed=42):
+    recorder = ReplayRecorder(str(path), seed)
+    recorder.record_start_game("Hard")
+    fire = FrameInput(fire=True)
+    for _ in range(500):
+        recorder.record_input(FrameInput(left=True))
+    for _ in range(3):
+        recorder.record_input(fire)
+    recorder.record_input(FrameInput(pause=True))
+    recorder.record_change_state("playing")
+    recorder.record_input(FrameInput())
+    recorder.close()
+    return recorder
+
+
+def test_records_round_trip(tmp_path):
+    path = tmp_path / "session.bsr"
+    recorder = record_sample(path)
+    assert recorder.frames == 505
+
+    seed, records = load_replay(path)
+    assert seed == 42
+    assert records == [
+        ("start_game", "Hard"),
+        ("input", FrameInput(left=True), 500),
+        ("input", FrameInput(fire=True), 3),
+        ("input", FrameInput(pause=True), 1),
+        ("change_state", "playing"),
+        ("input", FrameInput(), 1),
+    ]
+    # Runs are stored as one mask byte and a varint, not per frame
+    assert path.stat().st_size < HEADER.size + 20
+
+
+def test_truncated_file_is_rejected(tmp_path):
+    record_sample(tmp_path / "full.bsr")
+    data = (tmp_path / "full.bsr").read_bytes()
+    cut = tmp_path / "cut.bsr"
+    for length in range(len(data)):
+        cut.write_bytes(data[:length])
+        with pytest.raises(ReplayError):
+            load_replay(cut)
+
+
+def test_bad_magic_version_and_command(tmp_path):
+    path = tmp_path / "bad.bsr"
+    path.write_bytes(HEADER.pack(b"NOPE", VERSION, 1) + bytes([replay.END]))
+    with pytest.raises(ReplayError, match="Not a replay"):
+        load_replay(path)
+    path.write_bytes(HEADER.pack(MAGIC, VERSION + 1, 1) + bytes([replay.END]))
+    with pytest.raises(ReplayError, match="version"):
+        load_replay(path)
+    path.write_bytes(HEADER.pack(MAGIC, VERSION, 1) + bytes([replay.COMMAND_FLAG | 0x7E, 0, replay.END]))
+    with pytest.raises(ReplayError, match="command"):
+        load_replay(path)
+
+
+@pytest.mark.parametrize("command, argument", [(replay.CMD_START_GAME, len(replay.DIFFICULTY_NAMES)),
+                                               (replay.CMD_CHANGE_STATE, len(replay.STATES)),
+                                               (replay.CMD_CHANGE_STATE, 0xFF)])
+def test_out_of_range_command_argument(tmp_path, command, argument):
+    path = tmp_path / "bad.bsr"
+    path.write_bytes(HEADER.pack(MAGIC, VERSION, 1) + bytes([replay.COMMAND_FLAG | command, argument, replay.END]))
+    with pytest.raises(ReplayError, match="Bad command argument"):
+        load_replay(path)
+
+
+def test_recorded_game_replays_to_same_state(tmp_path, monkeypatch):
+    # Records through the windowed front end's own hooks (menu actions and
+    # run_tick), then re-simulates the file headless
+    import ballon_game as game
+    path = tmp_path / "game.bsr"
+    seed = 2024
+    game.init_game(seed, leaderboard_path=None, telemetry=None)
+    monkeypatch.setattr(game, "recorder", ReplayRecorder(str(path), seed))
+    monkeypatch.setattr(game, "snapshots", None)
+
+    game.start_game("Medium")
+    for frame in range(3000):
+        if game.sim.game_state == "game_over":
+            game.set_state("start")
+            game.start_game("Hard")
+        moving_right = (frame // 120) % 2 == 0
+        inputs = FrameInput(left=not moving_right, right=moving_right, fire=frame % 4 == 0,
+                            speed_up=frame == 10, pause=frame in (700, 760))
+        game.run_tick(inputs)
+    game.recorder.close()
+    sim = game.sim
+
+    assert sim.score > 0
+
+    replayed = play_replay(str(path))
+    assert replayed.frame == sim.frame
+    assert (replayed.score, replayed.lives, replayed.game_state, replayed.selected_difficulty) == \
+        (sim.score, sim.lives, sim.game_state, sim.selected_difficulty)
+    assert replayed.shooter_x == sim.shooter_x
+    assert [(b.x, b.y) for b in replayed.balloons] == [(b.x, b.y) for b in sim.balloons]
+    assert [tuple(r) for r in replayed.bullets] == [tuple(r) for r in sim.bullets]
+
+
+def test_replay_plays_out_the_same_on_every_backend(tmp_path, monkeypatch):
+    # Dense enough for balloons to share bullets, which is where the
+    # backends' collision order would show
+    pytest.importorskip("numpy")
+    monkeypatch.setitem(DIFFICULTY_LEVELS["Hard"], "spawn_delay", 60)
+    path = tmp_path / "dense.bsr"
+    seed = 77
+    recorder = ReplayRecorder(str(path), seed)
+    sim = Simulation(seed=seed)
+    recorder.record_start_game("Hard")
+    sim.start_game("Hard")
+    while sim.game_state == "playing" and sim.frame < 3000:
+        going_right = (sim.frame // 90) % 2 == 0
+        inputs = FrameInput(left=not going_right, right=going_right, fire=sim.frame % 2 == 0)
+        recorder.record_input(inputs)
+        sim.step(inputs)
+    recorder.close()
+    assert sim.score > 1000
+
+    def play(backend):
+        pops = []
+        replayed = play_replay(str(path), backend=backend,
+                               on_step=lambda sim, result: pops.append([(b.x, b.y) for b in result.popped]))
+        return pops, (replayed.frame, replayed.score, replayed.lives, replayed.game_state)
+
+    expected = play("list")
+    assert expected[1] == (sim.frame, sim.score, sim.lives, sim.game_state)
+    for backend in ("list-brute-force", "numpy"):
+        assert play(backend) == expected, backend
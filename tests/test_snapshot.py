@@ -0,0 +1,140 @@
+import struct
+
+import pytest
+
+import snapshot
+from snapshot import SnapshotRing, SnapshotError, capture, restore, HEADER, STATE, RNG, RNG_WORDS
+from simulation import Simulation, FrameInput
+
+BACKENDS = ["list", "list-brute-force", "numpy"]
+
+
+def make_sim(backend, seed=99):
+    if backend == "numpy":
+        pytest.importorskip("numpy")
+    return Simulation(backend=backend, seed=seed)
+
+
+def inputs_for(frame):
+    going_right = (frame // 90) % 2 == 0
+    return FrameInput(left=not going_right, right=going_right, fire=frame % 3 == 0)
+
+
+def play(sim, frames):
+    for _ in range(frames):
+        sim.lives = max(sim.lives, 1)   # keep playing whatever gets through
+        sim.step(inputs_for(sim.frame))
+    return sim
+
+
+def started_game(backend, frames=600):
+    sim = make_sim(backend)
+    sim.start_game("Hard")
+    sim.balloon_spawn_delay = 150
+    return play(sim, frames)
+
+
+def state_of(sim):
+    return (sim.frame, sim.score, sim.high_score, sim.lives, sim.shooter_x, sim.shooter_speed,
+            sim.spawn_elapsed_ms, sim.balloon_spawn_delay, sim.game_state, sim.selected_difficulty,
+            sim.rng.getstate(),
+            [(b.x, b.y, b.speed, b.color, b.radius, b.base_score) for b in sim.balloons],
+            [tuple(r) for r in sim.bullets])
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_capture_restore_round_trip(backend):
+    sim = started_game(backend)
+    assert sim.balloons and sim.bullets
+    data = capture(sim)
+
+    other = make_sim(backend, seed=1)
+    restore(other, data)
+    assert state_of(other) == state_of(sim)
+    assert capture(other) == data
+
+
+def test_snapshots_move_between_backends():
+    pytest.importorskip("numpy")
+    data = capture(started_game("list"))
+    sim = make_sim("numpy", seed=1)
+    restore(sim, data)
+    assert capture(sim) == data
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_restored_game_plays_on_identically(backend):
+    sim = started_game(backend)
+    data = capture(sim)
+    play(sim, 1500)
+
+    other = make_sim(backend, seed=1)
+    restore(other, data)
+    play(other, 1500)
+    assert state_of(other) == state_of(sim)
+
+
+def corrupt_cases(data):
+    # (description, bytes) for every kind of damage restore() must catch
+    pos = HEADER.size + STATE.size
+    state_length = data[pos]
+    difficulty_pos = pos + 1 + state_length
+    words_pos = difficulty_pos + 1 + data[difficulty_pos] + RNG.size
+    bad_string = bytearray(data)
+    bad_string[pos + 1:pos + 1 + state_length] = b"\xff" * state_length
+    bad_rng = bytearray(data)
+    # The last word is the Mersenne Twister's index, at most 624
+    struct.pack_into("<I", bad_rng, words_pos + 4 * (RNG_WORDS - 1), 10**6)
+    return [
+        ("bad magic", b"NOPE" + data[4:]),
+        ("newer version", HEADER.pack(snapshot.MAGIC, snapshot.VERSION + 1) + data[HEADER.size:]),
+        ("bad string", bytes(bad_string)),
+        ("bad RNG state", bytes(bad_rng)),
+    ] + [(f"truncated to {length}", data[:length]) for length in range(len(data))]
+
+
+def test_corrupt_snapshots_are_rejected_without_changing_the_game():
+    data = capture(started_game("list"))
+    sim = started_game("list", frames=50)
+    before = state_of(sim)
+    for description, damaged in corrupt_cases(data):
+        with pytest.raises(SnapshotError):
+            restore(sim, damaged)
+        assert state_of(sim) == before, description
+
+
+def test_rewind_goes_further_back_on_every_call():
+    sim = started_game("list", frames=0)
+    ring = SnapshotRing(interval=60, capacity=5)
+    for _ in range(400):
+        play(sim, 1)
+        ring.record(sim)
+    kept = [frame for frame, _ in ring.snapshots]
+    assert len(kept) == 5
+
+    rewound_to = []
+    while ring.rewind(sim):
+        rewound_to.append(sim.frame)
+    assert rewound_to == kept[::-1]
+    assert sim.frame == kept[0]
+    assert ring.stats()['rewinds'] == 5
+
+
+def test_rewind_after_playing_on_starts_from_the_newest_snapshot():
+    sim = started_game("list", frames=0)
+    ring = SnapshotRing(interval=60)
+    for _ in range(300):
+        play(sim, 1)
+        ring.record(sim)
+    assert ring.rewind(sim)
+    first = sim.frame
+    # Carrying on records fresh snapshots past the rewind point
+    for _ in range(120):
+        play(sim, 1)
+        ring.record(sim)
+    rewound_to = []
+    while ring.rewind(sim):
+        rewound_to.append(sim.frame)
+    assert rewound_to[0] > first
+    assert rewound_to == sorted(set(rewound_to), reverse=True)
+    assert rewound_to[-1] < first
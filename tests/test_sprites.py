@@ -0,0 +1,41 @@
+import random
+
+import pygame
+import pytest
+
+import ballon_game as game
+from entity_pool import Balloon
+from settings import BALLOON_TYPES, WIDTH, HEIGHT, attractive_colors
+from sprites import BalloonAtlas
+
+
+@pytest.fixture
+def screen(monkeypatch):
+    pygame.display.init()
+    surface = pygame.display.set_mode((WIDTH, HEIGHT))
+    monkeypatch.setattr(game, "screen", surface)
+    yield surface
+    pygame.display.quit()
+
+
+def pixels(surface):
+    return pygame.image.tobytes(surface, "RGB")
+
+
+def test_atlas_matches_primitive_drawing_at_fractional_y(screen):
+    atlas = BalloonAtlas()
+    radii = sorted({info['radius'] for info in BALLOON_TYPES.values()})
+    rng = random.Random(5)
+    for _ in range(300):
+        color = tuple(rng.choice(attractive_colors))
+        balloon = Balloon(rng.randrange(60, WIDTH - 60), rng.uniform(60, HEIGHT - 60), rng.uniform(1, 6),
+                          color, rng.choice(radii), 10)
+        lag = rng.choice([0.0, rng.random()])
+        screen.fill((0, 0, 0))
+        atlas.draw(screen, [balloon], lag=lag)
+        from_atlas = pixels(screen)
+
+        screen.fill((0, 0, 0))
+        game.draw_balloon(Balloon(balloon.x, balloon.y - balloon.speed * lag, balloon.speed,
+                                  color, balloon.radius, 10))
+        assert pixels(screen) == from_atlas, (balloon.x, balloon.y, lag)
@@ -0,0 +1,157 @@
+# --- Texture renderer backend ---
+# Draws through SDL2's Renderer (pygame._sdl2.video) instead of blitting
+# onto the display surface on the CPU (ballon_game.py --renderer texture):
+#
+#   * balloons come from the balloon atlas uploaded once as a texture, one
+#     textured quad each; SDL batches the copies and hands them to the GPU
+#     in a few draw calls;
+#   * bullets are filled rects and the shooter a small sprite texture;
+#   * the HUD (and the pause menu) are drawn in software onto transparent
+#     full-window layers, uploaded only when what's on them changed;
+#   * the pause screen's grey overlay is one blended quad rather than a
+#     per-pixel alpha blit over the whole window;
+#   * the static screens (start, game over) are still drawn on a plain
+#     Surface and uploaded whole when they are redrawn.
+#
+# The renderer is chosen at startup: a named SDL render driver ("opengl",
+# "direct3d", "metal", "software", ...), or by default the first accelerated
+# driver that can be created, falling back to SDL's software renderer (the
+# only one available on the dummy video driver). The software renderer
+# alpha-blends every textured pixel, so there it is slower than the surface
+# path's colorkeyed blits; it is the fallback, not the point.
+#
+# The window is SDL's own, not pygame.display's: a window can have a
+# display surface or a renderer, not both. So there is no display mode, and
+# Surface.convert() can't be used while this backend is active.
+
+import os
+
+import pygame
+from pygame._sdl2.video import Window, Renderer, Texture, get_drivers, error as SDLError
+
+# SDL_RendererFlags / SDL_BlendMode
+ACCELERATED = 0x02
+BLEND = 1
+
+
+class TextureRenderer:
+    def __init__(self, title, size, driver=None, vsync=False):
+        # driver: SDL render driver name; None picks the best one available
+        self.window = Window(title, size=size)
+        self.renderer, self.driver = self._create_renderer(driver, vsync)
+        self.size = size
+        self.textures = {}   # source surface -> Texture (atlas and sprites)
+        self.layers = {}     # name -> [key, Surface, Texture]
+        self.screen_texture = None
+        # Stats
+        self.frames = 0
+        self.uploads = 0
+
+    def _create_renderer(self, driver, vsync):
+        # SDL only batches draw calls on its own when it picks the driver
+        os.environ.setdefault("SDL_RENDER_BATCHING", "1")
+        drivers = list(get_drivers())
+        if driver is not None:
+            names = [info.name for info in drivers]
+            if driver not in names:
+                raise pygame.error(f"Unknown render driver {driver!r} (available: {', '.join(names)})")
+            candidates = [names.index(driver)]
+        else:
+            # Accelerated drivers first, in SDL's order of preference
+            candidates = sorted(range(len(drivers)), key=lambda i: not drivers[i].flags & ACCELERATED)
+        error = None
+        for index in candidates:
+            try:
+                return Renderer(self.window, index=index, vsync=vsync), drivers[index].name
+            except SDLError as e:
+                error = e
+        raise pygame.error(f"Could not create a renderer ({error})")
+
+    # --- Textures ---
+    def texture(self, surface):
+        # The texture made from `surface` (made once; the surface must not
+        # change afterwards). Colorkeyed surfaces become alpha textures.
+        texture = self.textures.get(surface)
+        if texture is None:
+            texture = self.textures[surface] = Texture.from_surface(self.renderer, surface)
+            texture.blend_mode = BLEND
+        return texture
+
+    def _layer(self, name):
+        layer = self.layers.get(name)
+        if layer is None:
+            texture = Texture(self.renderer, self.size, streaming=True)
+            texture.blend_mode = BLEND
+            layer = self.layers[name] = [None, pygame.Surface(self.size, pygame.SRCALPHA), texture]
+        return layer
+
+    # --- Drawing ---
+    def clear(self, color):
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.clear()
+
+    def fill(self, color, rect=None):
+        # An RGBA color is blended over what's already drawn
+        renderer = self.renderer
+        color = pygame.Color(color)
+        renderer.draw_blend_mode = BLEND if color.a < 255 else 0
+        renderer.draw_color = color
+        renderer.fill_rect(rect or (0, 0) + self.size)
+        renderer.draw_blend_mode = 0
+
+    def fill_rects(self, color, rects):
+        renderer = self.renderer
+        renderer.draw_color = pygame.Color(color)
+        fill_rect = renderer.fill_rect
+        for rect in rects:
+            fill_rect(rect)
+
+    def draw_sprite(self, surface, pos):
+        texture = self.texture(surface)
+        self.renderer.blit(texture, pygame.Rect(pos, surface.get_size()))
+
+    def draw_balloons(self, atlas, balloons, lag=0.0):
+        # Same placement as BalloonAtlas.draw, one quad per balloon
+        blit = self.renderer.blit
+        texture = self.texture
+        Rect = pygame.Rect
+        for source, dest, area in atlas.blit_sequence(balloons, lag):
+            if area is None:
+                blit(texture(source), Rect(dest, source.get_size()))
+            else:
+                blit(texture(source), Rect(dest, area.size), area)
+
+    def draw_layer(self, name, key, draw):
+        # Draws the full-window layer `name`. draw(surface) paints it onto a
+        # transparent surface, and is only called (and the layer uploaded)
+        # when `key` differs from last time; a key of None always redraws.
+        layer = self._layer(name)
+        _, surface, texture = layer
+        if key is None or key != layer[0]:
+            layer[0] = key
+            surface.fill((0, 0, 0, 0))
+            draw(surface)
+            texture.update(surface)
+            self.uploads += 1
+        texture.draw()
+
+    def present(self):
+        self.renderer.present()
+        self.frames += 1
+
+    def present_surface(self, surface):
+        # Shows a whole software-drawn screen
+        if self.screen_texture is None:
+            self.screen_texture = Texture(self.renderer, self.size, streaming=True)
+        self.screen_texture.update(surface)
+        self.uploads += 1
+        self.screen_texture.draw()
+        self.present()
+
+    def stats(self):
+        return {
+            'driver': self.driver,
+            'frames': self.frames,
+            'uploads': self.uploads,
+            'textures': len(self.textures),
+        }